@@ -0,0 +1,9 @@
+from components.batch import main
+
+import multiprocessing
+import sys
+
+if __name__=="__main__":
+    # needed for the process pool when running as a frozen executable
+    multiprocessing.freeze_support()
+    sys.exit(main())
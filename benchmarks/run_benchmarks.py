@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# running without a display and with a throwaway tag cache, set before qt or the components are imported
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+CACHE_DIR = tempfile.mkdtemp(prefix="codey-bench-")
+os.environ["XDG_CACHE_HOME"] = CACHE_DIR
+os.environ["LOCALAPPDATA"] = CACHE_DIR
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyQt5.QtWidgets as qtw
+from PyQt5.QtCore import QT_VERSION_STR, Qt
+from PyQt5.QtGui import QTextDocument
+from PyQt5.QtTest import QTest
+
+# benchmarks for the hot paths of the editor: highlighting, tagging, loading, saving, stats and typing
+# results are written as json so runs on different commits can be compared with --compare
+
+SIZES = {"KB": 1024, "MB": 1024 * 1024}
+WORDS = ("the a dog runs quickly over red fox and she said that it was never going to work but they tried anyway "
+    "because writing is hard # comment lines appear sometimes").split()
+
+def parse_size(text):
+    for suffix, factor in SIZES.items():
+        if text.upper().endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+# deterministic prose-like text of about the given number of bytes
+def synthetic_text(size, seed=0):
+    generator = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        sentences = []
+        for _ in range(generator.randint(1, 4)):
+            words = [generator.choice(WORDS) for _ in range(generator.randint(4, 16))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        line = " ".join(sentences)
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)[:size]
+
+# running a function several times and keeping the median and fastest times
+def measure(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), min(times)
+
+# running the event loop until a condition is met or the timeout passes
+def wait_until(app, condition, timeout=600):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark timed out")
+        app.processEvents()
+        time.sleep(0.001)
+
+class Benchmarks:
+    def __init__(self, app, repeats):
+        self.app = app
+        self.repeats = repeats
+        self.results = []
+
+    def record(self, name, corpus, median, best, unit="s", **extra):
+        result = {"name": name, "corpus": corpus, "median": median, "best": best, "unit": unit, "repeats": self.repeats}
+        result.update(extra)
+        self.results.append(result)
+        print(f"{name:<28} {corpus:<24} median {median:.6g}{unit}  best {best:.6g}{unit}", file=sys.stderr)
+
+    # time for SyntaxHighlighter.highlightBlock per block, with a word index like one filled by tagging
+    def highlight(self, corpus, text):
+        from components import SyntaxHighlighter
+        from components.tag_store import CATEGORIES
+        from PyQt5.QtGui import QTextCharFormat
+
+        document = QTextDocument()
+        document.setPlainText(text)
+        highlighter = SyntaxHighlighter()
+        word_index = {}
+        for position, word in enumerate(sorted(set(WORDS))):
+            word_index[word] = CATEGORIES[position % len(CATEGORIES)]
+        highlighter.set_word_index(word_index)
+        for category in CATEGORIES:
+            highlighter.set_category_format(category, QTextCharFormat())
+        highlighter.set_mapping(r'#.*$', QTextCharFormat())
+
+        # timing highlightBlock itself rather than the document layout that follows it
+        total = [0.0]
+        original = highlighter.highlightBlock
+        def timed(block_text):
+            start = time.perf_counter()
+            original(block_text)
+            total[0] += time.perf_counter() - start
+        highlighter.highlightBlock = timed
+        highlighter.setDocument(document)
+
+        def run():
+            total[0] = 0.0
+            highlighter.rehighlight()
+        times = []
+        for _ in range(self.repeats):
+            run()
+            times.append(total[0] / document.blockCount())
+        self.record("highlight_block", corpus, statistics.median(times), min(times), blocks=document.blockCount())
+        highlighter.setDocument(None)
+
+    # words per second through WorkerThread.set_pos_lists for each tagger backend, first with an empty cache and then with it full
+    def tagging(self, corpus, text):
+        from components import WorkerThread, SentenceCache
+        from components.taggers import TAGGERS
+
+        blocks = dict(enumerate(text.split("\n")))
+        word_count = len(text.split())
+        for tagger in TAGGERS:
+            worker = WorkerThread(SentenceCache(), tagger=tagger)
+            worker.set_pos_lists({0: "warm up the tagger model"})
+
+            def cold():
+                worker.cache.clear()
+                worker.set_pos_lists(blocks)
+            median, best = measure(cold, self.repeats)
+            self.record(f"tagging_cold_{tagger}", corpus, word_count / median, word_count / best, unit="words/s", words=word_count)
+            median, best = measure(lambda: worker.set_pos_lists(blocks), self.repeats)
+            self.record(f"tagging_cached_{tagger}", corpus, word_count / median, word_count / best, unit="words/s", words=word_count)
+
+    # load, save, stats and keystroke latency through a real main window
+    def window(self, corpus, text):
+        from components import MainWindow
+
+        directory = tempfile.mkdtemp(prefix="codey-bench-files-")
+        path = os.path.join(directory, "corpus.txt")
+        with open(path, 'w') as file:
+            file.write(text)
+
+        window = MainWindow()
+        window.show()
+        qtw.QFileDialog.getOpenFileName = staticmethod(lambda *args: (path, ''))
+
+        # time until the first chunk is shown, and until the whole file is in the editor
+        first_chunk, complete, blocked = [], [], []
+        # each repeat loads into the same tab, reset to an empty untitled document first, so only one copy of the corpus
+        # is ever open and the file isn't opened in a new tab
+        for _ in range(self.repeats):
+            window.reset_properties()
+            start = time.perf_counter()
+            window.load_file_method()
+            blocked.append(time.perf_counter() - start)
+            wait_until(self.app, lambda: not window.text_input.document().isEmpty())
+            first_chunk.append(time.perf_counter() - start)
+            wait_until(self.app, lambda: window.loader is None)
+            complete.append(time.perf_counter() - start)
+        self.record("load_call", corpus, statistics.median(blocked), min(blocked))
+        self.record("load_first_screen", corpus, statistics.median(first_chunk), min(first_chunk))
+        self.record("load_complete", corpus, statistics.median(complete), min(complete))
+
+        # time the gui is blocked by save_method, and until the file is written
+        saved = []
+        window.saver.saved.connect(lambda filename, state: saved.append(time.perf_counter()))
+        blocked, complete = [], []
+        for _ in range(self.repeats):
+            saved.clear()
+            start = time.perf_counter()
+            window.save_method()
+            blocked.append(time.perf_counter() - start)
+            wait_until(self.app, lambda: saved)
+            complete.append(saved[0] - start)
+        self.record("save_call", corpus, statistics.median(blocked), min(blocked))
+        self.record("save_complete", corpus, statistics.median(complete), min(complete))
+
+        median, best = measure(window.stats_method, self.repeats)
+        self.record("stats_method", corpus, median, best)
+        window.stats_dialog.close()
+
+        # typing in the middle of the document, each key followed by a synchronous repaint of the editor
+        cursor = window.text_input.textCursor()
+        cursor.setPosition(window.text_input.document().characterCount() // 2)
+        window.text_input.setTextCursor(cursor)
+        window.text_input.setFocus()
+        def keystroke():
+            QTest.keyClick(window.text_input, Qt.Key_A)
+            window.text_input.viewport().repaint()
+        median, best = measure(keystroke, max(self.repeats, 20))
+        self.record("keystroke_repaint", corpus, median, best)
+
+        window.text_input.document().setModified(False)
+        window.filename = path
+        window.close()
+        self.app.processEvents()
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# printing how much each result changed from an earlier run, slower is positive for times and negative for rates
+def compare(old_path, results):
+    with open(old_path) as file:
+        old = {(result["name"], result["corpus"]): result for result in json.load(file)["results"]}
+    print(f"\ncompared with {old_path}:", file=sys.stderr)
+    for result in results:
+        previous = old.get((result["name"], result["corpus"]))
+        if previous is None or not previous["median"]:
+            continue
+        change = (result["median"] - previous["median"]) / previous["median"] * 100
+        print(f"{result['name']:<28} {result['corpus']:<24} {change:+.1f}%", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark highlighting, tagging, file loading/saving, stats and typing.")
+    parser.add_argument("--sizes", default="1KB,10KB,100KB,1MB,10MB,50MB", help="comma separated sizes of synthetic corpora")
+    parser.add_argument("--corpus", action="append", default=[], help="real text file to benchmark, can be given more than once")
+    parser.add_argument("--repeats", type=int, default=5, help="times each measurement is repeated, the median is reported")
+    parser.add_argument("--only", choices=["highlight", "tagging", "window"], action="append", help="only run some benchmarks")
+    parser.add_argument("--output", default="bench_results.json", help="json file to write results to")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    app = qtw.QApplication.instance() or qtw.QApplication(sys.argv[:1])
+    benchmarks = Benchmarks(app, args.repeats)
+    corpora = [(f"synthetic-{size}", lambda size=size: synthetic_text(parse_size(size))) for size in args.sizes.split(",") if size]
+    for path in args.corpus:
+        corpora.append((os.path.basename(path), lambda path=path: open(path).read()))
+
+    for name, load in corpora:
+        text = load()
+        for benchmark in args.only or ["highlight", "tagging", "window"]:
+            getattr(benchmarks, benchmark)(name, text)
+
+    report = {"commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+        "qt": QT_VERSION_STR, "platform": platform.platform(), "results": benchmarks.results}
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"results written to {args.output}", file=sys.stderr)
+    if args.compare:
+        compare(args.compare, benchmarks.results)
+
+if __name__ == "__main__":
+    main()
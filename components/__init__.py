@@ -1,6 +1,21 @@
 from components.highlighter import SyntaxHighlighter
 from components.text_edit import QTextEdit
+from components.plain_text_edit import QPlainTextEdit
+from components.disk_cache import DiskTagCache
+from components.sentence_cache import SentenceCache
+from components.process_tagger import ProcessTagger
 from components.worker_thread import WorkerThread
+from components.tag_store import TagStore
+from components.tag_scheduler import TagScheduler
+from components.stats_engine import StatsEngine
+from components.search_index import SearchIndex
+from components.repetition_detector import RepetitionDetector
+from components.document_tab import DocumentTab
+from components.file_loader import FileLoaderThread
+from components.file_saver import FileSaverThread
 from components.customise_dialog import CustomiseDialog
 from components.stats_dialog import StatsDialog
+from components.metrics_dialog import MetricsDialog
+from components.find_dialog import FindDialog
+from components.overuse_dialog import OveruseDialog
 from components.main_window import MainWindow
\ No newline at end of file
@@ -0,0 +1,127 @@
+from components.sentence_cache import SentenceCache
+from components.disk_cache import DiskTagCache
+from components.taggers import TAGGERS, DEFAULT_TAGGER, make_tagger
+from components.tagging import block_sentences, tag_sentence, block_categories, count_categories, majority_category
+from components.tokens import tokenise
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import Counter
+import argparse
+import fnmatch
+import json
+import locale
+import os
+import sys
+import time
+
+# headless batch mode, tagging and counting stats for many files without the gui
+# each process has its own cache and tagger, no thread or event loop is started
+cache = None
+tagger = None
+
+def init_worker(use_disk_cache=False, tagger_name=None):
+    global cache, tagger
+    cache = SentenceCache(backing=DiskTagCache() if use_disk_cache else None)
+    tagger = make_tagger(tagger_name)
+    # loading the tagger model before the first file
+    tag_sentence(["warm", "up"], cache, tagger)
+
+# tagging one file and counting the same stats as the stats dialog, returning a dict for one json line
+# each line is a block, counted with its own tags like the stats engine does, words a line's tags don't have are
+# counted under the category most lines give them
+def analyse_file(path):
+    if cache is None:
+        init_worker()
+    start = time.perf_counter()
+    try:
+        with open(path, 'r', encoding=locale.getpreferredencoding(False)) as file:
+            text = file.read()
+    except (OSError, UnicodeDecodeError) as error:
+        return {"path": path, "error": str(error)}
+    category_counts = Counter()
+    # uses of each token, and of each token given a category by its own line
+    token_counts = Counter()
+    tagged_counts = Counter()
+    # word -> counter of how many lines gave each category to that word
+    word_counts = {}
+    for line in text.split("\n"):
+        tokens = Counter(tokenise(line))
+        tags = block_categories(tag_sentence(words, cache, tagger) for words in block_sentences(line))
+        categories, tagged = count_categories(tokens, tags)
+        category_counts.update(categories)
+        token_counts.update(tokens)
+        tagged_counts.update(tagged)
+        for word, category in tags.items():
+            word_counts.setdefault(word, Counter())[category] += 1
+    for word, count in (token_counts - tagged_counts).items():
+        category = majority_category(word_counts.get(word))
+        if category is not None:
+            category_counts[category] += count
+    cache.flush()
+    return {"path": path, "words": len(text.split()), "characters": len(text), "verbs": category_counts["verbs"],
+        "nouns": category_counts["nouns"], "adjs": category_counts["adjs"], "adverbs": category_counts["adverbs"],
+        "seconds": round(time.perf_counter() - start, 6)}
+
+# expanding directories into the files in them matching the pattern, files given directly are always included
+def find_files(paths, pattern="*.txt"):
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, filenames in os.walk(path):
+                subdirectories.sort()
+                for filename in sorted(filenames):
+                    if fnmatch.fnmatch(filename, pattern):
+                        yield os.path.join(directory, filename)
+        else:
+            yield path
+
+# analysing files across processes, writing a json line for each file as it finishes
+# returns the totals used for the throughput summary
+def run_batch(paths, output, processes=None, pattern="*.txt", use_disk_cache=False, tagger=None):
+    files = list(find_files(paths, pattern))
+    processes = processes or os.cpu_count() or 1
+    totals = {"files": 0, "errors": 0, "words": 0}
+    start = time.perf_counter()
+
+    def write(result):
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        totals["files"] += 1
+        if "error" in result:
+            totals["errors"] += 1
+        else:
+            totals["words"] += result["words"]
+
+    if processes == 1 or len(files) <= 1:
+        init_worker(use_disk_cache, tagger)
+        for path in files:
+            write(analyse_file(path))
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(use_disk_cache, tagger)) as executor:
+            futures = [executor.submit(analyse_file, path) for path in files]
+            for future in as_completed(futures):
+                write(future.result())
+
+    totals["seconds"] = time.perf_counter() - start
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tag files and count part of speech statistics without the gui, one JSON line per file.")
+    parser.add_argument("paths", nargs="+", help="files or directories to analyse")
+    parser.add_argument("-o", "--output", help="file to write JSON lines to, standard output if not given")
+    parser.add_argument("-p", "--processes", type=int, default=None, help="number of processes, defaults to the number of cores")
+    parser.add_argument("--pattern", default="*.txt", help="filename pattern for files found in directories")
+    parser.add_argument("--tagger", choices=sorted(TAGGERS), default=DEFAULT_TAGGER,
+        help="tagger backend, lexicon is fastest, hybrid gives the same tags as perceptron (default: %(default)s)")
+    parser.add_argument("--disk-cache", action="store_true", help="use and fill the on-disk tag cache shared with the editor")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, 'w', encoding="utf-8") if args.output else sys.stdout
+    try:
+        totals = run_batch(args.paths, output, args.processes, args.pattern, args.disk_cache, args.tagger)
+    finally:
+        if args.output:
+            output.close()
+
+    seconds = totals["seconds"] or 1e-9
+    print(f"{totals['files']} files ({totals['errors']} errors), {totals['words']} words in {totals['seconds']:.2f}s: "
+        f"{totals['files'] / seconds:.1f} files/s, {totals['words'] / seconds:.0f} words/s", file=sys.stderr)
+    return 1 if totals["errors"] else 0
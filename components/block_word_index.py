@@ -0,0 +1,33 @@
+# index of which blocks each word is used in, and which words each block uses, changed one block at a time
+# used by the tag store to find the blocks to highlight again and by the search index to find the blocks to search
+# words are lower cased first if fold_case is set, so searches can ignore case
+class BlockWordIndex:
+    def __init__(self, fold_case=False):
+        self.fold_case = fold_case
+        self.clear()
+
+    def clear(self):
+        # block id -> set of words in the block, and word -> set of block ids
+        self.block_words = {}
+        self.word_blocks = {}
+
+    # setting the words of a block from its tokens, an empty list for a block that was removed
+    def index_block(self, block_id, tokens):
+        words = {token.lower() for token in tokens} if self.fold_case else set(tokens)
+        old_words = self.block_words.pop(block_id, set())
+        for word in old_words - words:
+            blocks = self.word_blocks[word]
+            blocks.discard(block_id)
+            if not blocks:
+                del self.word_blocks[word]
+        for word in words - old_words:
+            self.word_blocks.setdefault(word, set()).add(block_id)
+        if words:
+            self.block_words[block_id] = words
+
+    # ids of the blocks using any of the given words
+    def blocks_with(self, words):
+        block_ids = set()
+        for word in words:
+            block_ids.update(self.word_blocks.get(word, ()))
+        return block_ids
@@ -1,16 +1,21 @@
 import PyQt5.QtWidgets as qtw
 from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal, QEvent
 from PyQt5.QtGui import QFont, QFontDatabase, QColor, QSyntaxHighlighter, QTextCharFormat, QIcon, QKeySequence, QTextCursor, QKeyEvent
+from components.taggers import TAGGERS, DEFAULT_TAGGER
+import os
 import sys
 
 class CustomiseDialog(qtw.QDialog):
     # adding extra attributes to store info that will be sent back to gui mainwindow
-    def __init__(self, mode):
+    def __init__(self, mode, tag_processes=1, tagger=DEFAULT_TAGGER, tag_cache_mb=32):
         super().__init__()
 
         self.font_size = None
         self.font_family = None
         self.mode = mode
+        self.tag_processes = tag_processes
+        self.tagger = tagger
+        self.tag_cache_mb = tag_cache_mb
 
         self.verb_colour = None
         self.noun_colour = None
@@ -53,6 +58,38 @@ class CustomiseDialog(qtw.QDialog):
             self.font_dropdown.addItem(font)
         self.layout.addWidget(self.font_dropdown)
 
+        # number of processes used to tag large documents, 1 keeps all tagging in the background thread
+        self.tag_processes_label = qtw.QLabel("Tagging Processes")
+        self.layout.addWidget(self.tag_processes_label)
+
+        self.tag_processes_box = qtw.QSpinBox()
+        self.tag_processes_box.setMinimum(1)
+        self.tag_processes_box.setMaximum(os.cpu_count() or 1)
+        self.tag_processes_box.setValue(self.tag_processes)
+        self.layout.addWidget(self.tag_processes_box)
+
+        # tagger backend, trading how accurate the highlighting is for how quickly it arrives
+        self.tagger_label = qtw.QLabel("Tagger")
+        self.layout.addWidget(self.tagger_label)
+        self.tagger_dropdown = qtw.QComboBox(self)
+        tagger_list = [("Accurate (perceptron)", "perceptron"), ("Balanced (perceptron with lexicon shortcut)", "hybrid"),
+            ("Fast (lexicon lookup)", "lexicon")]
+        for text, name in tagger_list:
+            if name in TAGGERS:
+                self.tagger_dropdown.addItem(text, name)
+        self.tagger_dropdown.setCurrentIndex(max(self.tagger_dropdown.findData(self.tagger), 0))
+        self.layout.addWidget(self.tagger_dropdown)
+
+        # most memory the cache of tagged sentences may use, the least recently used sentences are dropped past it
+        self.tag_cache_label = qtw.QLabel("Tag Cache Size (MB)")
+        self.layout.addWidget(self.tag_cache_label)
+
+        self.tag_cache_box = qtw.QSpinBox()
+        self.tag_cache_box.setMinimum(1)
+        self.tag_cache_box.setMaximum(4096)
+        self.tag_cache_box.setValue(self.tag_cache_mb)
+        self.layout.addWidget(self.tag_cache_box)
+
         # portion of dialog for setting highlight colours
         self.highlight_colour_label = qtw.QLabel("Highlight Colours")
         self.layout.addWidget(self.highlight_colour_label)
@@ -100,6 +137,9 @@ class CustomiseDialog(qtw.QDialog):
     def submitclose(self):
         self.set_font_size()
         self.set_font_family()
+        self.set_tag_processes()
+        self.set_tagger()
+        self.set_tag_cache_size()
         self.accept()
 
     # getting font size from widget and setting class attribute based on it
@@ -110,6 +150,18 @@ class CustomiseDialog(qtw.QDialog):
     def set_font_family(self):
         self.font_family = str(self.font_dropdown.currentText())
 
+    # getting number of tagging processes from widget and setting class attribute based on it
+    def set_tag_processes(self):
+        self.tag_processes = self.tag_processes_box.value()
+
+    # getting the tagger backend from widget and setting class attribute based on it
+    def set_tagger(self):
+        self.tagger = self.tagger_dropdown.currentData()
+
+    # getting the tag cache size limit from widget and setting class attribute based on it
+    def set_tag_cache_size(self):
+        self.tag_cache_mb = self.tag_cache_box.value()
+
     # getting part of speech and comment colours from widget and setting class attribute based on it
     def verb_colour_picker(self):
         verb_colour_picker = qtw.QColorDialog().getColor()
@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from components.taggers import nltk_version
+
+# bumped whenever the way tags are worked out or stored changes, so old entries are thrown away
+CACHE_FORMAT = 2
+
+# the version of nltk the cached tags came from, entries from another version are not used
+# each tagger backend has its own keys, so one database holds the tags from all of them
+def tagger_version():
+    return f"{CACHE_FORMAT}-nltk-{nltk_version()}"
+
+# per user cache directory, following each platform's usual place
+def default_cache_dir():
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "codey-text-editor")
+
+# sentence tags saved between sessions in a small sqlite database, keyed by the same sentence hash as the memory cache
+# so reopening a file only needs the sentences that changed to be tagged again
+# least recently used entries are deleted once the entries add up to more than max_bytes
+class DiskTagCache:
+    def __init__(self, path=None, max_bytes=64 * 1024 * 1024, version=None):
+        self.path = path or os.path.join(default_cache_dir(), "tags.sqlite3")
+        self.max_bytes = max_bytes
+        self.version = version or tagger_version()
+        self.lock = threading.Lock()
+        self.connection = None
+        self.size = 0
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.setup()
+        except (OSError, sqlite3.Error):
+            # carrying on without a disk cache if it can't be opened, tagging still works from scratch
+            self.connection = None
+
+    def setup(self):
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS sentences (key BLOB PRIMARY KEY, tags TEXT, size INTEGER, used REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS sentences_used ON sentences (used)")
+        row = self.connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        # tags from a different tagger version can't be trusted, starting again
+        if row is None or row[0] != self.version:
+            self.connection.execute("DELETE FROM sentences")
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self.version,))
+        self.connection.commit()
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM sentences").fetchone()[0]
+
+    def enabled(self):
+        return self.connection is not None
+
+    # getting the tags saved for any of the given keys, as a dict of key -> tuple of (word, category)
+    def get_many(self, keys):
+        found = {}
+        if self.connection is None:
+            return found
+        keys = list(keys)
+        with self.lock:
+            try:
+                # in chunks, sqlite limits the number of parameters in one query
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self.connection.execute(f"SELECT key, tags FROM sentences WHERE key IN ({placeholders})", chunk)
+                    for key, tags in rows:
+                        found[bytes(key)] = tuple(tuple(pair) for pair in json.loads(tags))
+                if found:
+                    now = time.time()
+                    self.connection.executemany("UPDATE sentences SET used = ? WHERE key = ?", [(now, key) for key in found])
+                    self.connection.commit()
+            except sqlite3.Error:
+                pass
+        return found
+
+    # saving tags for sentences (dict of key -> tags), then deleting the oldest entries if over the size limit
+    def put_many(self, entries):
+        if self.connection is None or not entries:
+            return
+        now = time.time()
+        rows = []
+        for key, tags in entries.items():
+            text = json.dumps(tags, separators=(",", ":"))
+            rows.append((key, text, len(key) + len(text), now))
+        with self.lock:
+            try:
+                old_sizes = {}
+                keys = list(entries)
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    for key, size in self.connection.execute(f"SELECT key, size FROM sentences WHERE key IN ({placeholders})", chunk):
+                        old_sizes[bytes(key)] = size
+                self.connection.executemany("INSERT OR REPLACE INTO sentences VALUES (?, ?, ?, ?)", rows)
+                self.size += sum(row[2] for row in rows) - sum(old_sizes.values())
+                self.evict()
+                self.connection.commit()
+            except sqlite3.Error:
+                pass
+
+    # deleting least recently used entries in batches until under the size limit
+    def evict(self):
+        while self.size > self.max_bytes:
+            rows = self.connection.execute("SELECT key, size FROM sentences ORDER BY used LIMIT 1000").fetchall()
+            if not rows:
+                self.size = 0
+                break
+            self.connection.executemany("DELETE FROM sentences WHERE key = ?", [(key,) for key, size in rows])
+            self.size -= sum(size for key, size in rows)
+
+    def clear(self):
+        if self.connection is None:
+            return
+        with self.lock:
+            self.connection.execute("DELETE FROM sentences")
+            self.connection.commit()
+            self.size = 0
+
+    def close(self):
+        if self.connection is not None:
+            with self.lock:
+                self.connection.close()
+                self.connection = None
@@ -0,0 +1,224 @@
+import PyQt5.QtWidgets as qtw
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QTextCharFormat, QTextCursor
+from components.highlighter import SyntaxHighlighter
+from components.text_edit import QTextEdit
+from components.plain_text_edit import QPlainTextEdit
+from components.tag_store import TagStore
+from components.stats_engine import StatsEngine
+from components.search_index import SearchIndex
+from components.repetition_detector import RepetitionDetector
+from components.profiler import instrumented
+import os
+
+# one open document, shown as a tab of the main window
+# each tab has its own editor, highlighter, tag store and stats, the tagging worker and caches are shared by all tabs
+class DocumentTab(qtw.QWidget):
+    # emitted when the tab moves between the rich and plain text editors
+    large_document_changed = pyqtSignal(bool)
+    # emitted when the document's modified flag changes, or a new document is set up
+    modified_changed = pyqtSignal(bool)
+
+    def __init__(self, editor_font, large_document_size=2 * 1024 * 1024):
+        super().__init__()
+        self.editor_font = editor_font
+        # documents with more characters than this are edited in a plain text editor, which only lays out what is shown
+        self.large_document_size = large_document_size
+        self.large_document = False
+        self.filename = None
+        # mtime, size and digest of the file when last loaded or saved, to notice changes made by other programs
+        self.file_state = None
+        # persistent store of tags for each block, only changed blocks are sent to be tagged again
+        self.tag_store = TagStore()
+        self.tag_store.tags_changed.connect(self.handle_tags_changed)
+        self.tag_store.block_tags_changed.connect(self.rehighlight_blocks)
+        # statistics kept up to date for each block as the document changes
+        self.stats_engine = StatsEngine(self.tag_store)
+        # index of the blocks each word is in, for find and replace
+        self.search_index = SearchIndex(self.tag_store)
+        # words used too often close together, highlighted and ranked in the overused words panel
+        self.repetition_detector = RepetitionDetector(self.tag_store)
+        self.repetition_detector.repeats_changed.connect(self.rehighlight_blocks)
+        # matches of the search are highlighted while the find dialog is open, only in the blocks being shown
+        self.showing_matches = False
+        self.match_format = QTextCharFormat()
+        self.match_format.setBackground(QColor("#44475a"))
+        # matches, and blocks not highlighted since the colours changed, are updated in the blocks being shown after
+        # scrolling or editing, several in a row only update them once, when the event loop is next free
+        self.visible_timer = QTimer(self)
+        self.visible_timer.setSingleShot(True)
+        self.visible_timer.setInterval(0)
+        self.visible_timer.timeout.connect(self.update_visible_blocks)
+        self.highlighter = SyntaxHighlighter()
+        self.tag_store.blocks_changed.connect(self.highlighter.handle_blocks_changed)
+        self.text_input = None
+        self.layout = qtw.QVBoxLayout()
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(self.layout)
+
+    # name shown on the tab
+    def title(self):
+        return os.path.basename(self.filename) if self.filename else "Untitled"
+
+    # creating a new empty text edit and connecting the highlighter and tag store to its document
+    # the highlighter's conditions are set up by the main window before this is called
+    def setup_editor(self):
+        self.replace_editor(QTextEdit(self, lineWrapMode=qtw.QTextEdit.WidgetWidth))
+        self.highlighter.setDocument(self.text_input.document())
+        self.tag_store.set_document(self.text_input.document())
+        self.text_input.document().contentsChange.connect(self.handle_contents_change)
+        self.text_input.document().modificationChanged.connect(self.modified_changed)
+        self.set_large_document(False)
+        self.modified_changed.emit(False)
+
+    # emptying the document for a new file, keeping the same editor and its settings
+    # a large document's plain text editor is replaced with a new rich text one, as new documents start out small
+    def new_document(self):
+        if self.large_document:
+            self.setup_editor()
+            return
+        self.highlighter.clear_pending()
+        document = self.text_input.document()
+        # clearing the document also clears its undo history
+        document.clear()
+        document.setModified(False)
+        self.text_input.setCurrentCharFormat(QTextCharFormat())
+        # forgetting the tags and counts of the old text
+        self.tag_store.set_document(document)
+        self.modified_changed.emit(False)
+
+    # putting a new editor in place of the current one
+    def replace_editor(self, editor):
+        if self.text_input is not None:
+            self.layout.removeWidget(self.text_input)
+            self.text_input.deleteLater()
+        self.text_input = editor
+        self.text_input.setFont(self.editor_font)
+        self.text_input.verticalScrollBar().valueChanged.connect(self.refresh_visible_blocks)
+        self.layout.addWidget(self.text_input)
+        self.refresh_visible_blocks()
+
+    def set_editor_font(self, font):
+        self.editor_font = font
+        self.text_input.setFont(font)
+
+    # checking after each edit whether the document has grown past the large document size, the character count is
+    # kept by the document so this doesn't depend on how long it is
+    def handle_contents_change(self, position, chars_removed, chars_added):
+        self.refresh_visible_blocks()
+        if chars_added > chars_removed and not self.large_document:
+            self.check_document_size()
+
+    # moving to the plain text editor if the document, plus any text about to be added, is over the large document size
+    def check_document_size(self, extra_chars=0):
+        if self.large_document or self.text_input.document().characterCount() + extra_chars <= self.large_document_size:
+            return
+        if extra_chars:
+            self.use_plain_text_editor()
+        else:
+            # not switching in the middle of the edit that made the document too long, the document is still changing
+            QTimer.singleShot(0, self.use_plain_text_editor)
+
+    # swapping the rich text editor for a plain text one that shares the same document, so the text, undo history,
+    # block tags and highlighting all carry over, the document is given the plain text layout that only lays out the
+    # blocks being shown instead of the whole document
+    def use_plain_text_editor(self):
+        if self.large_document:
+            return
+        old_input = self.text_input
+        document = old_input.document()
+        cursor = old_input.textCursor()
+        editor = QPlainTextEdit(self)
+        # the document is owned by the new editor so it isn't deleted along with the old one
+        document.setParent(editor)
+        document.setDocumentLayout(qtw.QPlainTextDocumentLayout(document))
+        editor.setDocument(document)
+        editor.setLineWrapMode(editor.WidgetWidth if old_input.lineWrapMode() else editor.NoWrap)
+        editor.setReadOnly(old_input.isReadOnly())
+        has_focus = old_input.hasFocus()
+        self.replace_editor(editor)
+        editor.setTextCursor(cursor)
+        if has_focus:
+            editor.setFocus()
+        self.set_large_document(True)
+
+    def set_large_document(self, large_document):
+        self.large_document = large_document
+        self.large_document_changed.emit(large_document)
+
+    # highlighting again only the blocks using words whose part of speech changed, visible ones first
+    @instrumented("document_tab.handle_tags_changed")
+    def handle_tags_changed(self, words):
+        first_visible, last_visible = self.visible_block_range()
+        self.highlighter.queue_rehighlight(self.tag_store.blocks_with_words(words), first_visible, last_visible)
+
+    # the highlight formats were changed in place, highlighting again the blocks being shown and the rest once shown
+    def formats_changed(self):
+        self.highlighter.formats_changed(*self.visible_block_range())
+
+    # blocks that came into view by the window being resized or the tab being shown may still need highlighting
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.refresh_visible_blocks()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_visible_blocks()
+
+    # highlighting again only the blocks whose own tags or repeated words changed, visible ones first
+    def rehighlight_blocks(self, block_ids):
+        blocks = {}
+        for block_id in block_ids:
+            block = self.tag_store.find_block(block_id)
+            if block is not None:
+                blocks[block_id] = block
+        first_visible, last_visible = self.visible_block_range()
+        self.highlighter.queue_rehighlight(blocks, first_visible, last_visible)
+
+    # getting the numbers of the first and last blocks shown in the text input
+    def visible_block_range(self):
+        viewport = self.text_input.viewport()
+        first_block = self.text_input.cursorForPosition(viewport.rect().topLeft()).block()
+        last_block = self.text_input.cursorForPosition(viewport.rect().bottomRight()).block()
+        return first_block.blockNumber(), last_block.blockNumber()
+
+    # highlighting matches of the search index's query in the blocks being shown, kept up to date on scrolling and editing
+    def show_matches(self):
+        self.showing_matches = True
+        self.refresh_visible_blocks()
+
+    def clear_matches(self):
+        self.showing_matches = False
+        if self.text_input is not None:
+            self.text_input.setExtraSelections([])
+
+    def refresh_visible_blocks(self):
+        if self.showing_matches or self.highlighter.has_stale():
+            self.visible_timer.start()
+
+    def update_visible_blocks(self):
+        if self.text_input is None:
+            return
+        first_visible, last_visible = self.visible_block_range()
+        self.highlighter.rehighlight_stale(first_visible, last_visible)
+        if self.showing_matches:
+            self.highlight_visible_matches(first_visible, last_visible)
+
+    def highlight_visible_matches(self, first_visible, last_visible):
+        document = self.text_input.document()
+        selections = []
+        for position, length, match in self.search_index.matches_between(first_visible, last_visible):
+            selection = qtw.QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(document)
+            selection.cursor.setPosition(position)
+            selection.cursor.setPosition(position + length, QTextCursor.KeepAnchor)
+            selection.format = self.match_format
+            selections.append(selection)
+        self.text_input.setExtraSelections(selections)
+
+    # disconnecting from the document before the tab is closed, so nothing is left listening to it
+    def close_document(self):
+        self.clear_matches()
+        self.highlighter.clear_pending()
+        self.highlighter.setDocument(None)
+        self.tag_store.set_document(None)
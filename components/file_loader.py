@@ -0,0 +1,90 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+import codecs
+import io
+import locale
+import mmap
+import os
+import threading
+from components.file_state import file_state, new_digest
+from components.profiler import instrumented
+
+# background thread reading a file in chunks, the gui appends each chunk as it arrives
+# so the first screen shows straight away and the gui never holds the whole file as one extra string
+class FileLoaderThread(QThread):
+    chunk_loaded = pyqtSignal(str)
+    progress = pyqtSignal(int)
+    # true if the whole file was loaded, false if loading was cancelled
+    load_finished = pyqtSignal(bool)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, filename, encoding=None, first_chunk_size=16 * 1024, chunk_size=512 * 1024):
+        super().__init__()
+        self.filename = filename
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        # small first chunk so the top of the file appears as soon as possible
+        self.first_chunk_size = first_chunk_size
+        self.chunk_size = chunk_size
+        self.cancelled = False
+        # state of the file once fully loaded, to compare against later
+        self.state = None
+        # chunks that can be waiting for the gui at once, released by the gui after each chunk is inserted
+        self.slots = threading.Semaphore(4)
+
+    def cancel(self):
+        self.cancelled = True
+
+    # called by the gui once it has inserted a chunk
+    def chunk_done(self):
+        self.slots.release()
+
+    @instrumented("load.read_file")
+    def run(self):
+        try:
+            with open(self.filename, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                # memory mapping where possible so the file isn't copied into memory up front
+                try:
+                    data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+                except (OSError, ValueError):
+                    data = file.read()
+                try:
+                    completed = self.read_chunks(data, size)
+                finally:
+                    if isinstance(data, mmap.mmap):
+                        data.close()
+                if completed:
+                    self.state = file_state(self.filename, self.digest.digest())
+        except (OSError, UnicodeDecodeError) as error:
+            self.load_failed.emit(str(error))
+            return
+        self.load_finished.emit(completed)
+
+    # decoding and emitting the file chunk by chunk, translating line endings like reading in text mode would
+    def read_chunks(self, data, size):
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(self.encoding)(), translate=True)
+        self.digest = new_digest()
+        position = 0
+        chunk_size = self.first_chunk_size
+        while position < size:
+            end = min(position + chunk_size, size)
+            self.digest.update(data[position:end])
+            text = decoder.decode(data[position:end])
+            position = end
+            chunk_size = self.chunk_size
+            if text and not self.emit_chunk(text):
+                return False
+            self.progress.emit(int(position * 100 / size))
+        text = decoder.decode(b"", final=True)
+        if text and not self.emit_chunk(text):
+            return False
+        return not self.cancelled
+
+    # waiting for the gui to have room for another chunk, giving up if cancelled
+    def emit_chunk(self, text):
+        while not self.slots.acquire(timeout=0.1):
+            if self.cancelled:
+                return False
+        if self.cancelled:
+            return False
+        self.chunk_loaded.emit(text)
+        return True
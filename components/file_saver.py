@@ -0,0 +1,118 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+import locale
+import os
+import queue
+import tempfile
+import threading
+from collections import Counter
+from components.file_state import file_state, new_digest
+from components.profiler import instrumented
+
+# long lived background thread writing files, so saving never blocks the gui
+# each file is written to a temporary file next to it, synced to disk and then renamed over the original,
+# so a crash part way through can never leave a half written file
+class FileSaverThread(QThread):
+    # filename and the state of the file as written
+    saved = pyqtSignal(str, object)
+    save_failed = pyqtSignal(str, str)
+
+    def __init__(self, encoding=None):
+        super().__init__()
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.jobs = queue.Queue()
+        # permissions for new files, the same as other programs would give them, the temporary file starts out private
+        # so it is changed to these before being renamed into place
+        # the umask can only be read by setting it, so this is done once here rather than while other threads run
+        umask = os.umask(0)
+        os.umask(umask)
+        self.new_file_mode = 0o666 & ~umask
+        # number of saves requested for each file that haven't been written yet, while a file has any its state on disk
+        # is about to change, so it isn't compared with the state the gui has
+        self.lock = threading.Lock()
+        self.pending = Counter()
+
+    # called from the gui thread with a snapshot of the text to save
+    def request(self, filename, text):
+        with self.lock:
+            self.pending[filename] += 1
+        self.jobs.put((filename, text))
+        if not self.isRunning():
+            self.start()
+
+    # waiting for any saves still queued to be written, then finishing
+    def stop(self):
+        if self.isRunning():
+            self.jobs.put(None)
+            self.wait()
+
+    # whether a save to the file is still queued or being written, called from the gui thread
+    def saving(self, filename):
+        with self.lock:
+            return self.pending[filename] > 0
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            # saves that queued up while the last one was writing are coalesced, only the newest text for each file is written
+            latest = {job[0]: job[1]}
+            requests = Counter([job[0]])
+            stopping = False
+            while not self.jobs.empty():
+                job = self.jobs.get()
+                if job is None:
+                    stopping = True
+                    break
+                latest.pop(job[0], None)
+                latest[job[0]] = job[1]
+                requests[job[0]] += 1
+            for filename, text in latest.items():
+                try:
+                    state = self.write_atomic(filename, text)
+                except (OSError, UnicodeEncodeError) as error:
+                    self.save_failed.emit(filename, str(error))
+                else:
+                    self.saved.emit(filename, state)
+                # only counted as written once the gui has been sent the new state, so it never compares the file
+                # with the state from before the save
+                with self.lock:
+                    self.pending[filename] -= requests[filename]
+                    if self.pending[filename] <= 0:
+                        del self.pending[filename]
+            if stopping:
+                return
+
+    @instrumented("save.write_file")
+    def write_atomic(self, filename, text):
+        # writing next to the file a symlink points at, so the file is replaced rather than the link
+        path = os.path.realpath(filename)
+        directory = os.path.dirname(path)
+        descriptor, temp_name = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+        # encoding here rather than writing in text mode so the digest is of exactly the bytes written
+        data = text.replace("\n", os.linesep).encode(self.encoding)
+        digest = new_digest()
+        digest.update(data)
+        try:
+            with open(descriptor, 'wb') as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            # keeping the permissions of the file being replaced
+            if os.path.exists(path):
+                os.chmod(temp_name, os.stat(path).st_mode & 0o7777)
+            else:
+                os.chmod(temp_name, self.new_file_mode)
+            os.replace(temp_name, path)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+            raise
+        # syncing the directory too so the rename itself survives a crash, not possible on windows
+        if os.name != "nt":
+            directory_descriptor = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(directory_descriptor)
+            finally:
+                os.close(directory_descriptor)
+        return file_state(filename, digest.digest())
@@ -0,0 +1,39 @@
+from collections import namedtuple
+import hashlib
+import os
+
+# what a file looked like when it was last loaded or saved, used to notice it being changed by another program
+FileState = namedtuple("FileState", ["mtime_ns", "size", "digest"])
+
+def new_digest():
+    return hashlib.blake2b(digest_size=16)
+
+# recording the state of a file just written or read, with the digest of the bytes that were in it
+def file_state(filename, digest):
+    stat = os.stat(filename)
+    return FileState(stat.st_mtime_ns, stat.st_size, digest)
+
+# hashing a whole file, only needed when its time changed but its size didn't
+def file_digest(filename):
+    digest = new_digest()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+# checking if a file has been changed since its state was recorded, a stat call unless the time changed but not the size
+def changed_on_disk(filename, state):
+    if state is None:
+        return False
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return True
+    if stat.st_mtime_ns == state.mtime_ns and stat.st_size == state.size:
+        return False
+    if stat.st_size != state.size:
+        return True
+    try:
+        return file_digest(filename) != state.digest
+    except OSError:
+        return True
@@ -0,0 +1,164 @@
+import PyQt5.QtWidgets as qtw
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QTextCursor
+import re
+
+# find and replace for the document in the current tab, left open (not modal) while editing
+# searching is done by the tab's search index, which only looks in blocks containing the words searched for
+class FindDialog(qtw.QDialog):
+    def __init__(self, tab):
+        super().__init__()
+        self.tab = None
+        # the number of matches is only counted once typing in the find box stops, as counting searches the document
+        self.count_timer = QTimer(self)
+        self.count_timer.setSingleShot(True)
+        self.count_timer.setInterval(200)
+        self.count_timer.timeout.connect(self.update_count)
+
+        self.window_setup()
+        self.widget_setup()
+        self.set_tab(tab)
+
+    # setting up dialog window properties
+    def window_setup(self):
+        self.setWindowTitle("Find and Replace")
+        width, height = 400, 250
+        self.setMinimumSize(width, height)
+
+        pixmapi = qtw.QStyle.SP_FileDialogContentsView
+        icon = self.style().standardIcon(pixmapi)
+        self.setWindowIcon(icon)
+
+    # setting up layout and widgets within it
+    def widget_setup(self):
+        self.layout = qtw.QVBoxLayout()
+
+        # text to find and what to replace it with
+        self.find_label = qtw.QLabel("Find")
+        self.layout.addWidget(self.find_label)
+        self.find_input = qtw.QLineEdit(self)
+        self.find_input.textChanged.connect(self.update_query)
+        self.find_input.returnPressed.connect(self.find_next)
+        self.layout.addWidget(self.find_input)
+
+        self.replace_label = qtw.QLabel("Replace With")
+        self.layout.addWidget(self.replace_label)
+        self.replace_input = qtw.QLineEdit(self)
+        self.layout.addWidget(self.replace_input)
+
+        # search options, changing any of them searches again straight away
+        self.whole_word_box = qtw.QCheckBox("Whole Word", self)
+        self.case_box = qtw.QCheckBox("Match Case", self)
+        self.regex_box = qtw.QCheckBox("Regular Expression", self)
+        for box in (self.whole_word_box, self.case_box, self.regex_box):
+            box.toggled.connect(self.update_query)
+            self.layout.addWidget(box)
+
+        self.count_label = qtw.QLabel("")
+        self.layout.addWidget(self.count_label)
+
+        button_layout = qtw.QHBoxLayout()
+        self.previous_button = qtw.QPushButton("Find Previous", self)
+        self.previous_button.clicked.connect(self.find_previous)
+        button_layout.addWidget(self.previous_button)
+        self.next_button = qtw.QPushButton("Find Next", self)
+        self.next_button.clicked.connect(self.find_next)
+        button_layout.addWidget(self.next_button)
+        self.replace_button = qtw.QPushButton("Replace", self)
+        self.replace_button.clicked.connect(self.replace)
+        button_layout.addWidget(self.replace_button)
+        self.replace_all_button = qtw.QPushButton("Replace All", self)
+        self.replace_all_button.clicked.connect(self.replace_all)
+        button_layout.addWidget(self.replace_all_button)
+        self.layout.addLayout(button_layout)
+
+        self.setLayout(self.layout)
+
+    # searching in a different tab, eg when the current tab changes, the old tab's matches stop being highlighted
+    def set_tab(self, tab):
+        if self.tab is not None and self.tab is not tab:
+            self.tab.clear_matches()
+        self.tab = tab
+        self.update_query()
+
+    # passing the search text and options to the tab's search index and highlighting the matches being shown
+    def update_query(self):
+        if self.tab is None:
+            return
+        try:
+            self.tab.search_index.set_query(self.find_input.text(), self.whole_word_box.isChecked(),
+                self.case_box.isChecked(), self.regex_box.isChecked())
+        except re.error as error:
+            self.tab.search_index.set_query("")
+            self.count_timer.stop()
+            self.count_label.setText("Invalid regular expression: {}".format(error))
+        else:
+            self.count_timer.start()
+        if self.isVisible():
+            self.tab.show_matches()
+
+    # the count is shown with a + once it reaches the search index's limit
+    def update_count(self):
+        if self.tab is None:
+            return
+        if self.find_input.text():
+            search_index = self.tab.search_index
+            count = search_index.match_count()
+            self.count_label.setText("Matches: {}{}".format(count, "+" if count >= search_index.count_limit else ""))
+        else:
+            self.count_label.setText("")
+
+    def find_next(self):
+        self.find(backward=False)
+
+    def find_previous(self):
+        self.find(backward=True)
+
+    # selecting the next match after the selection, or the one before it going backwards
+    def find(self, backward):
+        text_input = self.tab.text_input
+        cursor = text_input.textCursor()
+        match = self.tab.search_index.next_match(cursor.selectionStart() if backward else cursor.selectionEnd(), backward)
+        self.count_timer.start()
+        if match is None:
+            return
+        position, length, _ = match
+        cursor.setPosition(position)
+        cursor.setPosition(position + length, QTextCursor.KeepAnchor)
+        text_input.setTextCursor(cursor)
+        text_input.ensureCursorVisible()
+
+    # replacing the selected match, if the selection is one, then moving on to the next
+    def replace(self):
+        text_input = self.tab.text_input
+        cursor = text_input.textCursor()
+        match = self.tab.search_index.next_match(cursor.selectionStart())
+        if match is not None and cursor.hasSelection() and match[0] == cursor.selectionStart() \
+                and match[0] + match[1] == cursor.selectionEnd():
+            try:
+                cursor.insertText(self.tab.search_index.replacement_text(match[2], self.replace_input.text()))
+            except re.error as error:
+                self.count_label.setText("Invalid replacement: {}".format(error))
+                return
+            text_input.setTextCursor(cursor)
+        self.find_next()
+
+    # replacing every match at once, undone in one step
+    def replace_all(self):
+        try:
+            count = self.tab.search_index.replace_all(self.replace_input.text())
+        except re.error as error:
+            self.count_label.setText("Invalid replacement: {}".format(error))
+            return
+        self.count_label.setText("Replaced {}".format(count))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.tab is not None:
+            self.tab.show_matches()
+
+    # matches are only highlighted while the dialog is open
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if self.tab is not None:
+            self.tab.clear_matches()
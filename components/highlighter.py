@@ -1,40 +1,258 @@
 import PyQt5.QtWidgets as qtw
-from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal, QEvent
+from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal, QEvent, QTimer
 from PyQt5.QtGui import QFont, QFontDatabase, QColor, QSyntaxHighlighter, QTextCharFormat, QIcon, QKeySequence, QTextCursor, QKeyEvent
+from components.tokens import WORD_PATTERN
+from components.profiler import profiler, instrumented
 import re
 import sys
+import time
 
 class SyntaxHighlighter(QSyntaxHighlighter):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._mapping = {}
+        # word -> category dict, filled in from the tagging results and shared rather than copied
+        self._word_index = {}
+        # block id -> {word: category} from tagging each block's own sentences, also shared, words are looked up here
+        # first so a word keeps the part of speech it has in that block, then in the word index
+        self._block_tags = {}
+        # category -> format used for every word in that category
+        self._category_formats = {}
+        # block id -> set of lower case words repeated in the block, shared rather than copied, and the format drawn
+        # over them, merged with each category's format so repeated words keep their part of speech colour
+        self._repeat_index = {}
+        self._repeat_format = None
+        self._repeat_formats = {}
+        # after the formats change blocks keep their old formats until highlighted again, the ones being shown straight
+        # away and the rest as they are scrolled into view, the ids of blocks highlighted since the change are kept
+        # until every block of the document has been highlighted again
+        self._stale = False
+        self._fresh = set()
+        # regex conditions compiled once when added, as [priority, order added, compiled pattern, format]
+        self._rules = {}
+        self._rule_count = 0
+        # all regex conditions combined into one pattern, rebuilt only when the rules change
+        self._combined = None
+        self._combined_rules = {}
+        # blocks waiting to be highlighted again in the background, block id -> block
+        self._pending = {}
+        # how long each background batch may run before handing back to the event loop
+        self.slice_seconds = 0.008
+        self._pending_timer = QTimer()
+        self._pending_timer.setSingleShot(True)
+        self._pending_timer.setInterval(0)
+        self._pending_timer.timeout.connect(self.process_pending)
 
     # method to add each mapping to the dict
-    def set_mapping(self, condition, condition_format):
+    # regex conditions are compiled straight away, higher priority ones are drawn over lower ones where matches overlap
+    def set_mapping(self, condition, condition_format, priority=0):
         self._mapping[condition] = condition_format
+        if not hasattr(condition, "__call__"):
+            if condition in self._rules:
+                order = self._rules[condition][1]
+            else:
+                order = self._rule_count
+                self._rule_count += 1
+            self._rules[condition] = [priority, order, re.compile(condition), condition_format]
+            self.combine_rules()
+
+    # joining every regex condition into one alternation with a named group for each, in priority order
+    # so each block is scanned once however many rules there are
+    # each named group keeps its (priority, order added) and format, and the rules with a higher priority, which are
+    # searched for again from the start of its matches as the combined scan moves on past them
+    def combine_rules(self):
+        ordered = sorted(self._rules.values(), key=lambda rule: (-rule[0], rule[1]))
+        self._combined_rules = {}
+        parts = []
+        try:
+            for count, (priority, order, pattern, format) in enumerate(ordered):
+                name = f"rule{count}"
+                higher = [((rule[0], rule[1]), rule[2], rule[3]) for rule in ordered[:count] if rule[0] > priority]
+                self._combined_rules[name] = ((priority, order), format, higher)
+                parts.append(f"(?P<{name}>{scoped_pattern(pattern)})")
+            self._combined = re.compile("|".join(parts)) if parts else None
+        except re.error:
+            # some patterns can't be combined (eg numbered backreferences), scanning with each one instead
+            self._combined = False
+
+    # pointing the highlighter at the dict of word -> category it looks words up in
+    def set_word_index(self, word_index):
+        self._word_index = word_index
+
+    # pointing the highlighter at the dict of block id -> {word: category} it looks words up in first
+    def set_block_tags(self, block_tags):
+        self._block_tags = block_tags
+
+    # pointing the highlighter at a dict of category -> format shared by every highlighter, changing a format in the
+    # dict changes it for all of them without setting up the highlighting again
+    def set_format_table(self, format_table):
+        self._category_formats = format_table
+        self._repeat_formats = {}
 
-    # overriding main highlight function to be able to highlight based on conditional logic and also regex
+    # setting the format for all words of a category in the word index
+    def set_category_format(self, category, category_format):
+        self._category_formats[category] = category_format
+        self._repeat_formats = {}
+
+    # pointing the highlighter at the dict of block id -> repeated words, and the format to add to those words
+    def set_repeat_index(self, repeat_index, repeat_format):
+        self._repeat_index = repeat_index
+        self._repeat_format = repeat_format
+        self._repeat_formats = {}
+
+    # format for a repeated word of a category, made once for each category
+    def repeat_format(self, category):
+        format = self._repeat_formats.get(category)
+        if format is None:
+            format = QTextCharFormat(self._category_formats.get(category, QTextCharFormat()))
+            format.merge(self._repeat_format)
+            self._repeat_formats[category] = format
+        return format
+
+    # overriding main highlight function to be able to highlight based on looking up words and also regex
+    @instrumented("highlighter.highlight_block")
     def highlightBlock(self, text_to_highlight):
-        for condition, format in self._mapping.items():
-            # different types of conditions, logical ones are functions so will be callable
-            if hasattr(condition, "__call__"):
-                # find out if matches condition
-                split_words = text_to_highlight.split()
-                for c, word in enumerate(split_words):
-                    if condition(word.strip())==True:
-                        # finding the start index of word that matches condition using regex
-                        # stripping word but matches including punctuation right after word (word boundary before)
-                        iterator = re.finditer(f"\\b{word}(?=[\W_]+|$)", text_to_highlight)
-                        for match in iterator:
-                            # then highlighting using method of parent class qsyntaxhighlighter, not defined here
-                            self.setFormat(match.start(), len(word), format)
-
-            # regex condition otherwise
+        word_index = self._word_index
+        category_formats = self._category_formats
+        callables = [(condition, format) for condition, format in self._mapping.items() if hasattr(condition, "__call__")]
+        data = self.currentBlockUserData()
+        block_id = getattr(data, "block_id", None)
+        block_tags = self._block_tags.get(block_id) or {}
+        repeats = self._repeat_index.get(block_id) if self._repeat_format is not None else None
+        if self._stale and block_id is not None:
+            self._fresh.add(block_id)
+            # removed blocks are taken out of the fresh ids, so once there are as many as blocks all are up to date
+            if len(self._fresh) >= self.document().blockCount():
+                self._stale = False
+                self._fresh = set()
+
+        # single pass over the words of the block, each resolved with a dict lookup instead of searching lists
+        for match in WORD_PATTERN.finditer(text_to_highlight):
+            word = match.group()
+            start, end = match.span()
+            category = block_tags.get(word)
+            if category is None:
+                category = word_index.get(word)
+            if repeats and word.lower() in repeats:
+                format = self.repeat_format(category)
             else:
-                for match in re.finditer(condition, text_to_highlight):
+                format = category_formats.get(category)
+            if format is not None:
+                # highlighting using method of parent class qsyntaxhighlighter, not defined here
+                self.setFormat(start, end - start, format)
+            # any other logical conditions are functions so will be callable, checked on the same word spans
+            for condition, condition_format in callables:
+                if condition(word):
+                    self.setFormat(start, end - start, condition_format)
+
+        # regex conditions afterwards so they are drawn on top, eg comments
+        # one scan with the combined pattern, where matches overlap the one starting first is found, then each higher
+        # priority rule is searched for again from the start of the match, keeping its matches that start inside it even
+        # if they run on past its end (eg a TODO in a comment, or a quote that starts inside emphasis)
+        # the spans found are drawn lowest priority first so higher priority wins wherever they overlap
+        if self._combined:
+            combined_rules = self._combined_rules
+            spans = {}
+            for match in self._combined.finditer(text_to_highlight):
+                start, end = match.span()
+                if end > start:
+                    rank, format, higher = combined_rules[match.lastgroup]
+                    spans[(rank, start)] = (end, format)
+                    for higher_rank, pattern, higher_format in higher:
+                        for inner in pattern.finditer(text_to_highlight, start):
+                            if inner.start() >= end:
+                                break
+                            if inner.end() > inner.start():
+                                spans[(higher_rank, inner.start())] = (inner.end(), higher_format)
+            for (rank, start), (end, format) in sorted(spans.items(), key=lambda span: span[0]):
+                self.setFormat(start, end - start, format)
+        elif self._combined is False:
+            for priority, order, pattern, format in sorted(self._rules.values(), key=lambda rule: (rule[0], rule[1])):
+                for match in pattern.finditer(text_to_highlight):
                     start, end = match.span()
                     self.setFormat(start, end - start, format)
     
+    # highlighting blocks again after their words changed category (block id -> block)
+    # blocks between the first and last visible block numbers are done straight away, the rest in small batches
+    def queue_rehighlight(self, blocks, first_visible=0, last_visible=-1):
+        for block_id, block in blocks.items():
+            if first_visible <= block.blockNumber() <= last_visible:
+                self._pending.pop(block_id, None)
+                self.rehighlightBlock(block)
+            else:
+                self._pending[block_id] = block
+        if self._pending:
+            self._pending_timer.start()
+        profiler.gauge("highlighter.pending_blocks", len(self._pending))
+
+    # highlighting waiting blocks until the time for this batch runs out, then letting the event loop run
+    @instrumented("highlighter.process_pending")
+    def process_pending(self):
+        deadline = time.perf_counter() + self.slice_seconds
+        while self._pending and time.perf_counter() < deadline:
+            block = self._pending.pop(next(iter(self._pending)))
+            # blocks may have been removed since being queued
+            if block.isValid() and block.document() is self.document():
+                self.rehighlightBlock(block)
+        if self._pending:
+            self._pending_timer.start()
+
+    # called after formats in the format table were changed in place, highlighting again only the blocks being shown
+    def formats_changed(self, first_visible=0, last_visible=-1):
+        self._repeat_formats = {}
+        self._stale = True
+        self._fresh = set()
+        self.rehighlight_stale(first_visible, last_visible)
+
+    # whether some blocks may still have formats from before the last change
+    def has_stale(self):
+        return self._stale
+
+    # highlighting the blocks being shown that haven't been highlighted since the formats changed, eg after scrolling
+    def rehighlight_stale(self, first_visible, last_visible):
+        document = self.document()
+        if not self._stale or document is None:
+            return
+        block = document.findBlockByNumber(first_visible)
+        while block.isValid() and block.blockNumber() <= last_visible:
+            if getattr(block.userData(), "block_id", None) not in self._fresh:
+                self.rehighlightBlock(block)
+            block = block.next()
+
+    # forgetting blocks removed from the document, connected to the tag store's blocks_changed
+    def handle_blocks_changed(self, texts, tokens, removed):
+        self._fresh.difference_update(removed)
+        for block_id in removed:
+            self._pending.pop(block_id, None)
+
+    # forgetting queued blocks, eg when the document is replaced
+    def clear_pending(self):
+        self._pending = {}
+        self._pending_timer.stop()
+        self._stale = False
+        self._fresh = set()
+
     # clearing mappings by setting to an empty dict
     def clear_mappings(self):
         self._mapping = {}
+        self._category_formats = {}
+        self._repeat_formats = {}
+        self._rules = {}
+        self._rule_count = 0
+        self._combined = None
+        self._combined_rules = {}
+
+# inline flags that apply to a whole pattern, only allowed at the very start of the combined pattern
+GLOBAL_FLAGS = re.compile(r"^\(\?[aiLmsux]+\)")
+NUMBERED_BACKREFERENCE = re.compile(r"\\[1-9]")
+
+# getting the source of a compiled pattern with its flags scoped to just that pattern, to be joined with others
+def scoped_pattern(pattern):
+    flags = "".join(letter for flag, letter in ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+        if pattern.flags & flag)
+    source = pattern.pattern if isinstance(pattern.pattern, str) else pattern.pattern.decode()
+    source = GLOBAL_FLAGS.sub("", source)
+    # group numbers change once patterns are joined, so numbered backreferences would point at the wrong group
+    if NUMBERED_BACKREFERENCE.search(source):
+        raise re.error("numbered backreference can't be combined", source)
+    return f"(?{flags}:{source})" if flags else f"(?:{source})"
@@ -1,49 +1,102 @@
-from components import SyntaxHighlighter
-from components import QTextEdit
-from components import WorkerThread
 from components import CustomiseDialog
 from components import StatsDialog
+from components import DocumentTab
+from components import TagScheduler
+from components import SentenceCache
+from components import DiskTagCache
+from components import FileLoaderThread
+from components import FileSaverThread
+from components import MetricsDialog
+from components import FindDialog
+from components import OveruseDialog
+from components.profiler import profiler, instrumented
+from components import startup
+from components.file_state import changed_on_disk, file_state
+from components import ProcessTagger
+from components.taggers import DEFAULT_TAGGER
 
 import PyQt5.QtWidgets as qtw
-from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal, QEvent
+from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal, QEvent, QTimer
 from PyQt5.QtGui import QFont, QFontDatabase, QColor, QSyntaxHighlighter, QTextCharFormat, QIcon, QKeySequence, QTextCursor, QKeyEvent
-import nltk
+import os
 import sys
+import time
+
+# an attribute of the document in the current tab, so the menu actions act on the document being shown
+def tab_attribute(name):
+    return property(lambda self: getattr(self.tabs.currentWidget(), name),
+        lambda self, value: setattr(self.tabs.currentWidget(), name, value))
 
 class MainWindow(qtw.QMainWindow):
+    text_input = tab_attribute("text_input")
+    highlighter = tab_attribute("highlighter")
+    tag_store = tab_attribute("tag_store")
+    stats_engine = tab_attribute("stats_engine")
+    filename = tab_attribute("filename")
+    file_state = tab_attribute("file_state")
+    large_document = tab_attribute("large_document")
+
     # adding some extra properties to the default constructor
     def __init__(self):
         super().__init__()
         # starting in dark mode, can toggle to light mode in customise menu
         self.mode = "dark"
-        # list of each part of speech for highlighting
-        self.verbs = []
-        self.nouns = []
-        self.adjs = []
-        self.adverbs = []
+        self.stats_dialog = None
+        self.metrics_dialog = None
+        self.find_dialog = None
+        self.overuse_dialog = None
         # initial highlight colours
         self.verb_colour = QColor("#b5ea78")
         self.noun_colour = QColor("#f1c96e")
         self.adj_colour = QColor("#b77fd7")
         self.adverb_colour = QColor("#c97477")
         self.comment_colour = QColor("#5F9EA0")
-        # some default values 
-        self.filename = None
+        # underline for words used too often close together
+        self.repeat_colour = QColor("#ff5555")
+        # formats used by every tab's highlighter, changed in place when colours change so nothing has to be set up again
+        self.highlight_formats = {category: QTextCharFormat() for category in ("verbs", "nouns", "adjs", "adverbs", "comments", "repeats")}
+        self.apply_colours()
+        # one file is loaded at a time, into the tab it was opened in
+        self.loader = None
+        self.loading_tab = None
+        # background thread that saves files, writing to a temporary file and renaming it over the original
+        self.saver = FileSaverThread()
+        self.saver.saved.connect(self.handle_saved)
+        self.saver.save_failed.connect(self.handle_save_failed)
         self.font_family = "Consolas"
         self.font_size = 10
+        # documents with more characters than this are edited in a plain text editor, which only lays out what is shown
+        self.large_document_size = 2 * 1024 * 1024
+        # milliseconds to wait after the last edit before tagging changed blocks
+        self.tag_debounce = 300
+        # cache of tagged sentences, bounded in size, so unchanged sentences are never tagged twice
+        self.tag_cache_size = 32 * 1024 * 1024
+        # backed by a cache on disk so reopening a file doesn't need it tagged from scratch
+        self.disk_cache = DiskTagCache()
+        self.sentence_cache = SentenceCache(self.tag_cache_size, self.disk_cache)
+        # tagger backend, trading accuracy for speed, chosen in the customise menu
+        self.tagger = DEFAULT_TAGGER
+        # pool of processes used for large amounts of untagged text, small edits are tagged in the worker thread
+        self.process_tagger = ProcessTagger(tagger=self.tagger)
         # calling some methods that will set properties of the window itself
         # adding the top ribbon menu and connecting it to relevant actions
         # setting up keyboard shortcuts
         self.window_setup()
         self.setup_menu()
         self.setup_shortcuts()
-        # adding an instance of syntaxhighlighter and text input (assigned in define_conditions)
-        self.highlighter = SyntaxHighlighter()
-        self.setup_highlighter()
-        self.setCentralWidget(self.text_input)
         # setting some styling and starting worker thread background processes
-        self.setStyleSheet("QTextEdit {background-color: rgb(30, 30, 30); color: white}")
+        self.setStyleSheet("QTextEdit, QPlainTextEdit {background-color: rgb(30, 30, 30); color: white}")
         self.start_worker_thread()
+        # each open document is a tab, all sharing the one worker thread and tag cache
+        self.tabs = qtw.QTabWidget(self)
+        self.tabs.setDocumentMode(True)
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.currentChanged.connect(self.handle_tab_changed)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.setCentralWidget(self.tabs)
+        self.new_tab()
+        startup.mark("window_created")
 
     def window_setup(self):
         # some setup for the application window - size, title, icon
@@ -82,6 +135,16 @@ class MainWindow(qtw.QMainWindow):
         self.new_file_action.setText('&New File')
         self.new_file_action.triggered.connect(self.new_file_method)
 
+        self.new_tab_action = qtw.QAction(self)
+        self.new_tab_action.setText('New &Tab')
+        self.new_tab_action.setShortcut(QKeySequence('Ctrl+t'))
+        self.new_tab_action.triggered.connect(self.new_tab)
+
+        self.close_tab_action = qtw.QAction(self)
+        self.close_tab_action.setText('&Close Tab')
+        self.close_tab_action.setShortcut(QKeySequence('Ctrl+w'))
+        self.close_tab_action.triggered.connect(lambda: self.close_tab(self.tabs.currentIndex()))
+
         self.customise_action = qtw.QAction(self)
         self.customise_action.setText('&Customise')
         self.customise_action.triggered.connect(self.customise_menu_method)
@@ -112,15 +175,41 @@ class MainWindow(qtw.QMainWindow):
         self.minus_font_action.setText('&Decrease Font')
         self.minus_font_action.triggered.connect(self.minus_font_method)
 
+        # profiling of the hot paths, for finding out where time goes when the editor lags
+        self.profiling_action = qtw.QAction(self)
+        self.profiling_action.setText('&Enable Profiling')
+        self.profiling_action.setCheckable(True)
+        self.profiling_action.setChecked(profiler.enabled)
+        self.profiling_action.triggered.connect(profiler.set_enabled)
+
+        self.metrics_action = qtw.QAction(self)
+        self.metrics_action.setText('&Performance Metrics')
+        self.metrics_action.triggered.connect(self.metrics_method)
+
+        self.export_trace_action = qtw.QAction(self)
+        self.export_trace_action.setText('E&xport Trace')
+        self.export_trace_action.triggered.connect(self.export_trace_method)
+
         self.stats_action = qtw.QAction(self)
         self.stats_action.setText('&Statistics')
         self.stats_action.triggered.connect(self.stats_method)
 
+        self.find_action = qtw.QAction(self)
+        self.find_action.setText('&Find and Replace')
+        self.find_action.setShortcut(QKeySequence('Ctrl+f'))
+        self.find_action.triggered.connect(self.find_method)
+
+        self.overuse_action = qtw.QAction(self)
+        self.overuse_action.setText('&Overused Words')
+        self.overuse_action.triggered.connect(self.overuse_method)
+
         # adding actions to menu, in the order will appear in the menu
         file_menu.addAction(self.new_file_action)
+        file_menu.addAction(self.new_tab_action)
         file_menu.addAction(self.load_action)
         file_menu.addAction(self.save_action)
         file_menu.addAction(self.save_as_action)
+        file_menu.addAction(self.close_tab_action)
         file_menu.addAction(self.exit_action)
 
         format_menu.addAction(self.customise_action)
@@ -128,15 +217,37 @@ class MainWindow(qtw.QMainWindow):
 
         edit_menu.addAction(self.bold_action)
         edit_menu.addAction(self.italic_action)
+        edit_menu.addAction(self.find_action)
         edit_menu.addAction(self.stats_action)
+        edit_menu.addAction(self.overuse_action)
 
         view_menu.addAction(self.plus_font_action)
         view_menu.addAction(self.minus_font_action)
+        view_menu.addSeparator()
+        view_menu.addAction(self.profiling_action)
+        view_menu.addAction(self.metrics_action)
+        view_menu.addAction(self.export_trace_action)
 
-        #setting up bottom status bar (no content)
+        #setting up bottom status bar
         self.statusbar = qtw.QStatusBar()
         self.setStatusBar(self.statusbar)
 
+        # live word and character counts
+        self.stats_label = qtw.QLabel()
+        self.statusbar.addPermanentWidget(self.stats_label)
+
+        # progress of loading a file and button to stop it, only shown while a file is loading
+        self.load_progress = qtw.QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.hide()
+        self.statusbar.addPermanentWidget(self.load_progress)
+
+        self.load_cancel_button = qtw.QPushButton("Cancel")
+        self.load_cancel_button.clicked.connect(self.cancel_loading)
+        self.load_cancel_button.hide()
+        self.statusbar.addPermanentWidget(self.load_cancel_button)
+
     def setup_shortcuts(self):
         # adding keyboard shortcuts - what key sequence will trigger, and what method that will call
         self.shortcut_comment = qtw.QShortcut(QKeySequence('Ctrl+/'), self)
@@ -157,12 +268,12 @@ class MainWindow(qtw.QMainWindow):
     # shortcut for increasing font point size by two
     def plus_font_method(self):
         self.font_size += 2
-        self.text_input.setFontPointSize(self.font_size)
+        self.apply_font()
 
     # shortcut for decreasing font point size by two
     def minus_font_method(self):
-        self.font_size -= 2
-        self.text_input.setFontPointSize(self.font_size)
+        self.font_size = max(self.font_size - 2, 2)
+        self.apply_font()
 
     # method to bold or unbold font, either with shortcut of by clicking in menu
     def bold_method(self):
@@ -208,155 +319,364 @@ class MainWindow(qtw.QMainWindow):
             self.text_input.setFontItalic(True)
             self.italic_action.setChecked(True)
 
-    # method to get the statistics that will be disaplayed in stats dialog
+    # method to show the statistics dialog, the stats are already counted so it opens straight away
+    # and it is left open (not modal) to keep updating as the text changes
+    # showing the stats of the current tab
     def stats_method(self):
-        split_text = self.text_input.toPlainText().split(" ")
-        word_count = len([i for i in split_text if len(i) > 0])
-        verb_count = 0
-        noun_count = 0
-        adj_count = 0 
-        adv_count = 0
-        char_count = len(self.text_input.toPlainText())
-
-        verb_tag_start = "VB"
-        noun_tag_start = "NN"
-        adjective_tag_start = "JJ"
-        adverb_tag_start = "RB"
-
-        for word, tag in nltk.pos_tag(split_text):
-            if tag.startswith((verb_tag_start, noun_tag_start, adjective_tag_start, adverb_tag_start)):
-                if tag.startswith(verb_tag_start):
-                    verb_count += 1
-                elif tag.startswith(noun_tag_start):
-                    noun_count +=1 
-                elif tag.startswith(adjective_tag_start):
-                    adj_count += 1
-                else:
-                    adv_count += 1
-
-        stats_dialog = StatsDialog([word_count, char_count, verb_count, noun_count, adj_count, adv_count])
-        stats_dialog.exec()
-
-    # closing the main window
+        if self.stats_dialog is None:
+            self.stats_dialog = StatsDialog(self.stats_engine.stats())
+        else:
+            self.stats_dialog.update_stats(self.stats_engine.stats())
+        self.stats_dialog.show()
+        self.stats_dialog.raise_()
+
+    # showing the most overused words of the current tab, already counted so it opens straight away
+    # and left open (not modal) to keep updating as the text changes
+    def overuse_method(self):
+        overused = self.tabs.currentWidget().repetition_detector.overused()
+        if self.overuse_dialog is None:
+            self.overuse_dialog = OveruseDialog(overused)
+        else:
+            self.overuse_dialog.update_overused(overused)
+        self.overuse_dialog.show()
+        self.overuse_dialog.raise_()
+
+    # new overused words from one of the tabs, only shown if it is the current tab
+    def handle_overuse_changed(self, overused):
+        if self.overuse_dialog is None or self.sender() is not self.tabs.currentWidget().repetition_detector:
+            return
+        self.overuse_dialog.update_overused(overused)
+
+    # showing the find and replace dialog for the current tab, left open (not modal) to keep searching while editing
+    # any selected text is searched for
+    def find_method(self):
+        if self.find_dialog is None:
+            self.find_dialog = FindDialog(self.tabs.currentWidget())
+        selected = self.text_input.textCursor().selectedText()
+        if selected and "\u2029" not in selected:
+            self.find_dialog.find_input.setText(selected)
+        self.find_dialog.show()
+        self.find_dialog.raise_()
+        self.find_dialog.find_input.setFocus()
+        self.find_dialog.find_input.selectAll()
+
+    # showing the profiler's timings in a debug panel, left open and refreshing while it is shown
+    def metrics_method(self):
+        if self.metrics_dialog is None:
+            self.metrics_dialog = MetricsDialog(self.sentence_cache)
+        self.metrics_dialog.show()
+
+    # saving the recorded timings as a chrome trace json file
+    def export_trace_method(self):
+        filename, _ = qtw.QFileDialog.getSaveFileName(self, 'Export Trace', 'trace.json', 'JSON files (*.json)')
+        if len(filename) > 0:
+            try:
+                profiler.export_trace(filename)
+            except OSError as error:
+                qtw.QMessageBox.warning(self, 'Export Trace', 'Could not export trace: {}'.format(error))
+            else:
+                self.statusbar.showMessage('Trace exported to {}'.format(filename), 3000)
+
+    # showing word and character counts in the status bar
+    def update_stats_label(self, stats):
+        self.stats_label.setText(f"Words: {stats[0]}  Characters: {stats[1]}")
+
+    # new stats from one of the tabs, only shown if it is the current tab
+    def handle_stats_changed(self, stats):
+        if self.sender() is not self.stats_engine:
+            return
+        self.update_stats_label(stats)
+        if self.stats_dialog is not None:
+            self.stats_dialog.update_stats(stats)
+
+    # closing the main window, asking about unsaved changes first
     def exit_method(self):
-        qtw.qApp.quit()
+        self.close()
+
+    # stopping the worker thread when the window is closed so it isn't destroyed while running
+    def closeEvent(self, event):
+        # asking about each tab with unsaved changes in turn
+        for tab in self.all_tabs():
+            self.tabs.setCurrentWidget(tab)
+            if not self.maybe_save():
+                event.ignore()
+                return
+        # saves only finish in the background, so waiting for them and handling what they sent back before closing
+        # a save that failed marks its document as modified again and shows the error, and the window stays open
+        saved = [tab for tab in self.all_tabs() if not tab.text_input.document().isModified()]
+        self.saver.stop()
+        qtw.QApplication.sendPostedEvents(None, QEvent.MetaCall)
+        if any(tab.text_input.document().isModified() for tab in saved):
+            event.ignore()
+            return
+        self.cancel_loading()
+        self.scheduler.stop()
+        self.disk_cache.close()
+        if self.stats_dialog is not None:
+            self.stats_dialog.close()
+        if self.metrics_dialog is not None:
+            self.metrics_dialog.close()
+        if self.find_dialog is not None:
+            self.find_dialog.close()
+        if self.overuse_dialog is not None:
+            self.overuse_dialog.close()
+        super().closeEvent(event)
 
     # method to save file, calls save as if file is not already saved, otherwise overwrites current filename
     def save_method(self):
         if not self.filename:
             self.save_as_method()
         else:
-            text = self.text_input.toPlainText()
-            with open(self.filename + '.txt', 'w') as file:
-                file.write(text)
+            self.save_to(self.filename)
 
     # save as method, opens file explorer starting at current directory and gets input on file name
     def save_as_method(self):
         filename, _ = qtw.QFileDialog.getSaveFileName(self, 'Save file', '', 'Text files (*.txt)')
-        self.filename = filename
         if len(filename) > 0:
-            self.setWindowTitle('{} - Text Editor'.format(self.filename))
-            text = self.text_input.toPlainText()
-            with open(self.filename, 'w') as file:
-                file.write(text)
-
-    # loading file using qt filedialog, reads text and inserts that text into the central text edit widget
+            # the state recorded was of the old file, the new one's arrives once it has been written
+            self.filename = filename
+            self.file_state = None
+            self.update_titles()
+            self.save_to(self.filename)
+
+    # taking a snapshot of the text and handing it to the saver thread to be written in the background
+    # the document counts as unmodified from the snapshot on, unless the save fails
+    @instrumented("save.snapshot")
+    def save_to(self, filename):
+        self.saver.request(filename, self.text_input.toPlainText())
+        self.text_input.document().setModified(False)
+        self.statusbar.showMessage('Saving {}'.format(filename))
+
+    # saves finish in the background, so the tab may no longer be the current one
+    def handle_saved(self, filename, state):
+        for tab in self.all_tabs():
+            if filename == tab.filename:
+                tab.file_state = state
+        self.statusbar.showMessage('Saved {}'.format(filename), 3000)
+
+    def handle_save_failed(self, filename, error):
+        for tab in self.all_tabs():
+            if filename == tab.filename:
+                tab.text_input.document().setModified(True)
+        self.statusbar.clearMessage()
+        qtw.QMessageBox.warning(self, 'Save', 'Could not save {}: {}'.format(filename, error))
+
+    # loading file using qt filedialog, the file is read in chunks in a background thread and each chunk inserted into the
+    # central text edit widget as it arrives
+    # opened in a new tab unless the current tab is an empty untitled document
     def load_file_method(self):
         # select file using QFileDialog
         filename, _ = qtw.QFileDialog.getOpenFileName(self, 'Open File', '', 'Text Files (*.txt)')
-        # read contents using general read file
-        with open(filename, 'r') as file:
-            file_text = file.read()
-        # insert text into the text box
-        self.text_input.insertPlainText(file_text)
-        # set filename to name of opened file
-        self.filename = filename
-        self.setWindowTitle('{} - Text Editor'.format(self.filename))
+        if not filename:
+            return
+        if self.filename is not None or not self.text_input.document().isEmpty():
+            self.new_tab()
+        self.open_file(filename)
+
+    # reading a file into the text input of the current tab in the background
+    def open_file(self, filename):
+        self.cancel_loading()
+        self.loading_tab = self.tabs.currentWidget()
+        # switching to the plain text editor before any text goes in if the file will make the document too long
+        try:
+            self.loading_tab.check_document_size(os.path.getsize(filename))
+        except OSError:
+            pass
+        # a file loaded into an empty document matches the file on disk once loaded
+        self.load_into_empty = self.text_input.document().isEmpty()
+        # inserting at the cursor, this cursor moves along as each chunk is inserted
+        self.load_cursor = self.text_input.textCursor()
+        # no typing or undo history while loading, undoing half a file wouldn't make sense
+        self.text_input.setReadOnly(True)
+        self.text_input.document().setUndoRedoEnabled(False)
+
+        self.loader = FileLoaderThread(filename)
+        self.load_started = time.perf_counter()
+        self.loader.chunk_loaded.connect(self.handle_chunk_loaded)
+        self.loader.progress.connect(self.load_progress.setValue)
+        self.loader.load_finished.connect(self.handle_load_finished)
+        self.loader.load_failed.connect(self.handle_load_failed)
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.load_cancel_button.show()
+        self.statusbar.showMessage('Loading {}'.format(filename))
+        self.loader.start()
+
+    # inserting each chunk of the file as it is read and letting the loader read the next one
+    @instrumented("load.insert_chunk")
+    def handle_chunk_loaded(self, text):
+        # ignoring chunks still queued from a loader that has been cancelled
+        if self.sender() is not self.loader:
+            return
+        self.load_cursor.insertText(text)
+        self.loader.chunk_done()
+
+    # set filename to name of opened file, only once all of it has loaded so a partly loaded file can't overwrite it
+    def handle_load_finished(self, completed):
+        if self.sender() is not self.loader:
+            return
+        filename = self.loader.filename
+        state = self.loader.state
+        tab = self.loading_tab
+        self.finish_loading()
+        if completed:
+            if profiler.enabled:
+                profiler.record("load.total", self.load_started, time.perf_counter())
+            tab.filename = filename
+            tab.file_state = state
+            if self.load_into_empty:
+                tab.text_input.document().setModified(False)
+            self.update_titles()
+            self.statusbar.showMessage('Loaded {}'.format(filename), 3000)
+        else:
+            self.statusbar.showMessage('Stopped loading {}'.format(filename), 3000)
+
+    def handle_load_failed(self, error):
+        if self.sender() is not self.loader:
+            return
+        self.finish_loading()
+        qtw.QMessageBox.warning(self, 'Open File', 'Could not open file: {}'.format(error))
+
+    # stopping a file that is still loading
+    def cancel_loading(self):
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader.wait()
+            self.finish_loading()
+
+    # putting the text input back to normal after loading finishes or stops
+    def finish_loading(self):
+        self.loader = None
+        self.load_progress.hide()
+        self.load_cancel_button.hide()
+        self.statusbar.clearMessage()
+        self.loading_tab.text_input.setReadOnly(False)
+        self.loading_tab.text_input.document().setUndoRedoEnabled(True)
+        self.loading_tab = None
 
     # method to create a new file, checks for unsaved changes and warns user giving ability to save if unsaved changes
     def new_file_method(self):
-        # checking if latest updates have been saved
-        if self.unsaved_changes():
-            # dialog to ask whether to save
-            want_to_save = qtw.QMessageBox.question(self, 'Save Changes', 'There are unsaved changes. Would you like to save?',
-            qtw.QMessageBox.Yes | qtw.QMessageBox.No)
-            if want_to_save == qtw.QMessageBox.Yes:
-                # save if has filename else save as (logic already in save method)
-                self.save_method()
-            # cancelling new file if neither button pressed
-            elif want_to_save != qtw.QMessageBox.No:
-                return
+        if not self.maybe_save():
+            return
         # make a new file by resetting everything including filename and text input contents
         self.reset_properties()
 
+    # checking if latest updates have been saved and asking whether to save them, false if the user cancelled
+    def maybe_save(self):
+        if not self.unsaved_changes():
+            return True
+        # dialog to ask whether to save
+        want_to_save = qtw.QMessageBox.question(self, 'Save Changes', 'There are unsaved changes. Would you like to save?',
+        qtw.QMessageBox.Yes | qtw.QMessageBox.No | qtw.QMessageBox.Cancel)
+        if want_to_save == qtw.QMessageBox.Yes:
+            # save if has filename else save as (logic already in save method)
+            self.save_method()
+            # save as dialog was cancelled
+            return self.filename is not None
+        # cancelling if neither yes or no pressed
+        return want_to_save == qtw.QMessageBox.No
+
     # method to toggle whether text wraps at end of line or not
     def wrap_text_method(self):
         current_wrap = self.text_input.lineWrapMode()
         # enum corresponding to default mode WidgetWidth
+        # taken from the text input as the rich and plain text editors each have their own enum
         if current_wrap == 1:
-            self.text_input.setLineWrapMode(qtw.QTextEdit.NoWrap)
+            self.text_input.setLineWrapMode(self.text_input.NoWrap)
         else:
-            self.text_input.setLineWrapMode(qtw.QTextEdit.WidgetWidth)
+            self.text_input.setLineWrapMode(self.text_input.WidgetWidth)
 
-    # method used to check if there are unsaved changes
+    # method used to check if there are unsaved changes, using the document's modified flag which follows the undo stack
+    # so it is the same cost however long the document is
     def unsaved_changes(self):
         # if it's still untitled can assume unsaved changes as long as it's not empty
-        current_text = self.text_input.toPlainText()
         if self.filename == None:
-            if len(current_text) == 0:
-                return False
-            else:
-                return True
-        # otherwise check if the file at path is the same as the contents of text input
-        else:
-            with open(self.filename, 'r') as file:
-                saved_text = file.read()
-            if current_text == saved_text:
-                return False
-            else:
-                return True
+            return not self.text_input.document().isEmpty()
+        return self.text_input.document().isModified()
+
+    # checking if the open file was changed by another program, a cheap stat unless the time changed but the size didn't
+    # a file still being saved to is about to change, so it is left until its new state arrives
+    def file_changed_on_disk(self):
+        return (self.filename is not None and not self.saver.saving(self.filename)
+            and changed_on_disk(self.filename, self.file_state))
+
+    # offering to reload the file when coming back to the window after it was changed elsewhere
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow() and self.loader is None and self.file_changed_on_disk():
+            # only asking once for each change to the file
+            try:
+                self.file_state = file_state(self.filename, None)
+            except OSError:
+                self.file_state = None
+            reload = qtw.QMessageBox.question(self, 'File Changed', '{} has been changed on disk. Would you like to reload it?'.format(self.filename),
+            qtw.QMessageBox.Yes | qtw.QMessageBox.No)
+            if reload == qtw.QMessageBox.Yes:
+                self.text_input.clear()
+                self.open_file(self.filename)
 
-    # resetting rpoperties for use when creating a new file
+    # resetting rpoperties of the current tab for use when creating a new file
     def reset_properties(self):
-        self.verbs = []
-        self.nouns = []
-        self.adjs = []
-        self.adverbs = []
-
+        if self.loading_tab is self.tabs.currentWidget():
+            self.cancel_loading()
+        # the same text input is kept, its document is emptied and the tag store reset
         self.filename = None
-        self.setWindowTitle("Untitled - Text Editor")
-        self.setup_highlighter()
-        self.setCentralWidget(self.text_input)
+        self.file_state = None
+        self.tabs.currentWidget().new_document()
+        self.update_titles()
 
     # method to execute the customise dialog and apply changes from it once it is closed/changes are applied from dialog
     def customise_menu_method(self):
-        customise_menu = CustomiseDialog(self.mode)
+        customise_menu = CustomiseDialog(self.mode, self.process_tagger.processes, self.tagger,
+            self.tag_cache_size // (1024 * 1024))
         # customise_menu.exec()
         if customise_menu.exec_():
+            self.process_tagger.set_processes(customise_menu.tag_processes)
+            self.update_tagger(customise_menu.tagger)
+            self.update_tag_cache_size(customise_menu.tag_cache_mb * 1024 * 1024)
             self.update_font(customise_menu.font_size, customise_menu.font_family)
             self.update_highlight_colours(customise_menu.verb_colour, customise_menu.noun_colour, customise_menu.adverb_colour, customise_menu.adj_colour, customise_menu.comment_colour)
             self.update_mode(customise_menu.mode)
 
+    # switching tagger backend, the document is tagged again in the background and keeps its highlighting until then
+    def update_tagger(self, tagger):
+        if tagger is None or tagger == self.tagger:
+            return
+        self.tagger = tagger
+        self.process_tagger.tagger = tagger
+        self.scheduler.set_tagger(tagger)
+
+    # changing how much memory the cache of tagged sentences may use, a smaller limit drops the least recently used straight away
+    def update_tag_cache_size(self, tag_cache_size):
+        if tag_cache_size == self.tag_cache_size:
+            return
+        self.tag_cache_size = tag_cache_size
+        self.sentence_cache.set_max_bytes(tag_cache_size)
+
     # method to toggle between light and dark mode
+    # the stylesheet is only set again if the mode changed, as it restyles every widget in the window
     def update_mode(self, mode):
+        if mode == self.mode:
+            return
         self.mode = mode
         if mode == "light":
-            self.setStyleSheet("QTextEdit {background-color: rgb(255, 255, 255); color: black}")
+            self.setStyleSheet("QTextEdit, QPlainTextEdit {background-color: rgb(255, 255, 255); color: black}")
         else:
-            self.setStyleSheet("QTextEdit {background-color: rgb(30, 30, 30); color: white}")
+            self.setStyleSheet("QTextEdit, QPlainTextEdit {background-color: rgb(30, 30, 30); color: white}")
 
-    # method to update font (size and family) across the existing text edit
+    # method to update font (size and family) across the existing text edits
     def update_font(self, font_size, font_family):
         self.font_size = font_size
         self.font_family = font_family
-        # setting existing font to be the size given
-        cursor = self.text_input.textCursor()
-        self.text_input.selectAll()
-        self.text_input.setFontPointSize(self.font_size)
-        self.text_input.setTextCursor(cursor)
-        # setting this as size going forward, keeping current font family
-        new_font = QFont(self.font_family, self.font_size)
-        self.text_input.setFont(new_font)
+        self.apply_font()
+
+    # setting the font as the document's default font, text is never given a size or family of its own so all of it
+    # follows the default, this doesn't touch the text itself so it takes the same time however long the document is,
+    # and isn't added to the undo history
+    def apply_font(self):
+        font = QFont(self.font_family, self.font_size)
+        for tab in self.all_tabs():
+            tab.set_editor_font(font)
 
     # updating colours that each part of speech is highlighted with
     def update_highlight_colours(self, verb_colour, noun_colour, adverb_colour, adj_colour, comment_colour):
@@ -370,105 +690,174 @@ class MainWindow(qtw.QMainWindow):
             self.adj_colour = adj_colour
         if comment_colour:
             self.comment_colour = comment_colour
-        # applying these changes to the conditions of the text highlighter
-        self.highlighter.clear_mappings()
-        self.define_conditions()
-
-    # method to comment out text with keyboard shortcut
-    # moves to start of line, adds comment char and moves back
+        if not any((verb_colour, noun_colour, adverb_colour, adj_colour, comment_colour)):
+            return
+        # changing the formats every tab's highlighter shares, only the blocks being shown are highlighted straight away
+        self.apply_colours()
+        for tab in self.all_tabs():
+            tab.formats_changed()
+
+    # setting the colours of the shared highlight formats
+    def apply_colours(self):
+        formats = self.highlight_formats
+        formats["verbs"].setForeground(self.verb_colour)
+        formats["nouns"].setForeground(self.noun_colour)
+        formats["adjs"].setForeground(self.adj_colour)
+        formats["adverbs"].setForeground(self.adverb_colour)
+        formats["comments"].setForeground(self.comment_colour)
+        # wavy underline for repeated words, drawn over their part of speech colour
+        formats["repeats"].setUnderlineStyle(QTextCharFormat.WaveUnderline)
+        formats["repeats"].setUnderlineColor(self.repeat_colour)
+
+    # method to comment out text with keyboard shortcut, every line in the selection (or just the cursor's line) is
+    # commented, or uncommented if they all already are
+    # the lines are changed through one cursor in one edit block, so it is a single undo step and the document only
+    # reports the change once it is finished, the highlighter and tag store then go over the changed lines once
     def comment_shortcut(self):
-        # using cursor positions and inserting text, getting current cursor info
-        current_cursor = self.text_input.textCursor()
-        current_cursor_pos = current_cursor.position()
-        current_y = current_cursor.columnNumber()
-
-        # move backward to start of line with columnnumber
-        current_cursor.movePosition(QTextCursor.Left, QTextCursor.MoveAnchor, current_y)
-        # think have to reassign after each move of cursor?
-        self.text_input.setTextCursor(current_cursor)
-        char_cursor = self.text_input.textCursor()
-        char_cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor)
-        first_char = char_cursor.selectedText()
-        # if not already comment, comment
-        if first_char != "#":
-            self.text_input.insertPlainText('# ')
-            # and reset to original position plus 2 for hashtag and space
-            current_cursor.setPosition(current_cursor_pos + 2)
-            self.text_input.setTextCursor(current_cursor)
-        # else comment
-        else:
-            # char delta variable will track how far from cursor start position to move back (2 if # and space, 1 if just #)
-            char_delta = 2
-            # selecting first two chars of line
-            current_cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor)
-            current_cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor)
-            # deselecting second char if it's not a space
-            if current_cursor.selectedText()[-1] != " ":
-                current_cursor.movePosition(QTextCursor.Left, QTextCursor.KeepAnchor)
-                char_delta -= 1
-            # deleting selected text and resetting cursor connected to editor
-            current_cursor.removeSelectedText()
-            current_cursor.setPosition(current_cursor_pos - char_delta)
-            self.text_input.setTextCursor(current_cursor)
-
-    # worker thread for part of speech tagging in background
+        document = self.text_input.document()
+        cursor = self.text_input.textCursor()
+        first_block = document.findBlock(cursor.selectionStart())
+        last_block = document.findBlock(cursor.selectionEnd())
+        # a selection ending at the very start of a line doesn't include that line
+        if last_block != first_block and cursor.selectionEnd() == last_block.position():
+            last_block = last_block.previous()
+        blocks = [first_block]
+        while blocks[-1] != last_block:
+            blocks.append(blocks[-1].next())
+        # blank lines are left alone when commenting more than one line
+        if len(blocks) > 1:
+            blocks = [block for block in blocks if block.text().strip()] or blocks
+        uncomment = all(block.text().startswith("#") for block in blocks)
+
+        # the text input's own cursor isn't moved, it follows the text as the comment characters go in or out
+        edit_cursor = QTextCursor(document)
+        edit_cursor.beginEditBlock()
+        for block in blocks:
+            edit_cursor.setPosition(block.position())
+            if uncomment:
+                # removing the hashtag and the space after it if there is one
+                edit_cursor.setPosition(block.position() + (2 if block.text().startswith("# ") else 1), QTextCursor.KeepAnchor)
+                edit_cursor.removeSelectedText()
+            else:
+                edit_cursor.insertText("# ")
+        edit_cursor.endEditBlock()
+
+    # starting the worker thread once the window is first shown, so importing nltk and loading the tagger model
+    # happen in the background instead of delaying the window, comments are highlighted without them
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.scheduler.worker.isRunning():
+            startup.mark("window_shown")
+            QTimer.singleShot(0, self.scheduler.start)
+            QTimer.singleShot(0, lambda: startup.mark("interactive"))
+
+    # worker thread for part of speech tagging in background, only woken up when the document changes
     def start_worker_thread(self):
-        # starting worker thread and triggering method when it finishes
-        self.worker = WorkerThread(self.text_input.toPlainText())
-        self.worker.start()
-        self.worker.finished.connect(self.when_worker_finished)
+        # scheduler waits for edits to pause before sending changed blocks to its one long lived worker thread
+        # tabs add their tag stores to it as they are opened
+        self.scheduler = TagScheduler(None, self.tag_debounce, self.sentence_cache, self.process_tagger, self.tagger)
         # catching the returned signal from worker thread and passing to another method
-        self.worker.return_value.connect(self.handle_pos_returned)
+        self.scheduler.worker.return_value.connect(self.handle_pos_returned)
 
-    # restarts thread so it runs continuously
-    def when_worker_finished(self):
-        self.start_worker_thread()
-
-    # reassigning values of part of speech lists after worker thread has processed text and returned them
+    # merging the tags for each changed block into the stores after worker thread has processed and returned them
+    @instrumented("main_window.handle_pos_returned")
     def handle_pos_returned(self, value):
-        self.verbs = value.get("verbs")
-        self.nouns = value.get("nouns")
-        self.adjs = value.get("adjs")
-        self.adverbs = value.get("adverbs")
+        self.scheduler.apply_results(value)
+        startup.mark("first_highlight")
+
+    # opening a new tab with an empty untitled document, made the current tab
+    def new_tab(self):
+        tab = DocumentTab(QFont(self.font_family, self.font_size), self.large_document_size)
+        tab.stats_engine.stats_changed.connect(self.handle_stats_changed)
+        tab.repetition_detector.overuse_changed.connect(self.handle_overuse_changed)
+        tab.large_document_changed.connect(self.handle_large_document_changed)
+        tab.modified_changed.connect(self.update_titles)
+        self.setup_highlighter(tab)
+        self.scheduler.add_store(tab.tag_store)
+        self.tabs.setCurrentIndex(self.tabs.addTab(tab, tab.title()))
+        tab.text_input.setFocus()
+        return tab
+
+    def all_tabs(self):
+        return [self.tabs.widget(index) for index in range(self.tabs.count())]
+
+    # closing a tab, asking about unsaved changes first, there is always at least one tab open
+    def close_tab(self, index):
+        tab = self.tabs.widget(index)
+        self.tabs.setCurrentIndex(index)
+        if not self.maybe_save():
+            return
+        if self.loading_tab is tab:
+            self.cancel_loading()
+        self.scheduler.remove_store(tab.tag_store)
+        tab.close_document()
+        self.tabs.removeTab(index)
+        tab.deleteLater()
+        if self.tabs.count() == 0:
+            self.new_tab()
+
+    # only the document being shown is tagged, the others wait until they are shown again
+    def handle_tab_changed(self, index):
+        tab = self.tabs.widget(index)
+        if tab is None:
+            return
+        self.scheduler.set_active(tab.tag_store)
+        self.update_format_actions(tab.large_document)
+        self.wrap_text_action.setChecked(bool(tab.text_input.lineWrapMode()))
+        stats = tab.stats_engine.stats()
+        self.update_stats_label(stats)
+        if self.stats_dialog is not None:
+            self.stats_dialog.update_stats(stats)
+        if self.find_dialog is not None:
+            self.find_dialog.set_tab(tab)
+        if self.overuse_dialog is not None:
+            self.overuse_dialog.update_overused(tab.repetition_detector.overused())
+        self.update_titles()
+
+    # showing the current file in the window title, and each tab's file with a * if it has unsaved changes
+    def update_titles(self):
+        for index, tab in enumerate(self.all_tabs()):
+            modified = "*" if tab.text_input is not None and tab.text_input.document().isModified() else ""
+            self.tabs.setTabText(index, tab.title() + modified)
+        tab = self.tabs.currentWidget()
+        if tab is not None:
+            self.setWindowTitle('{} - Text Editor'.format(tab.filename or "Untitled"))
+
+    # a tab moving to the plain text editor, only matters here if it is the current tab
+    def handle_large_document_changed(self, large_document):
+        if self.sender() is not self.tabs.currentWidget():
+            return
+        self.update_format_actions(large_document)
+        if large_document:
+            self.statusbar.showMessage('Large document, using plain text editing', 3000)
+
+    # bold and italic text only exist in the rich text editor, so they are turned off for large documents
+    def update_format_actions(self, large_document):
+        for action in (self.bold_action, self.italic_action, self.shortcut_bold, self.shortcut_italic):
+            action.setEnabled(not large_document)
 
     # defining formatting conditions for highlighting
     # mostly based on word being in part of speech tagged list with some regex based formatting
-    def setup_highlighter(self):
+    # and creating a new text input for a new tab with the highlighter connected to it
+    def setup_highlighter(self, tab):
         # disconnecting highlighter from text input/document to refresh formatting conditions
-        self.highlighter.setDocument(None)
-
-        self.define_conditions()
-
-        # creating the textedit box and connecting the highlighter to that box
-        self.text_input = QTextEdit(self, lineWrapMode=qtw.QTextEdit.WidgetWidth)
-        self.text_input.setFont(QFont(self.font_family, self.font_size))
-        self.highlighter.setDocument(self.text_input.document())
-
-    # defining conditions for when text will be highlighted
-    def define_conditions(self):
-        # formatting for some major parts of speech
-        verb_format = QTextCharFormat()
-        verb_format.setForeground(self.verb_colour)
-
-        noun_format = QTextCharFormat()
-        noun_format.setForeground(self.noun_colour)
+        tab.highlighter.setDocument(None)
+        tab.highlighter.clear_pending()
 
-        adj_format = QTextCharFormat()
-        adj_format.setForeground(self.adj_colour)
+        self.define_conditions(tab)
 
-        adverb_format = QTextCharFormat()
-        adverb_format.setForeground(self.adverb_colour)
+        tab.setup_editor()
 
-        # lambda function for cleaner evaluation in highlightblock method, call and check if true
-        pos_info = [[lambda x: x in self.verbs, verb_format], [lambda x: x in self.nouns, noun_format],
-        [lambda x: x in self.adjs, adj_format], [lambda x: x in self.adverbs, adverb_format]]
+    # defining conditions for when text will be highlighted in a tab, using the shared highlight formats
+    def define_conditions(self, tab):
+        # format for each major part of speech, the highlighter looks up each word's category in the tags of its block
+        # and then in the tag store's word index
+        tab.highlighter.set_format_table(self.highlight_formats)
+        tab.highlighter.set_word_index(tab.tag_store.word_categories)
+        tab.highlighter.set_block_tags(tab.tag_store.block_tags)
 
-        # adding to the highlighter instance
-        for i, j in pos_info:
-            self.highlighter.set_mapping(i, j)
+        tab.highlighter.set_repeat_index(tab.repetition_detector.block_repeats, self.highlight_formats["repeats"])
 
         # comment formatting with hashtag for now
-        comment_format = QTextCharFormat()
-        comment_format.setForeground(self.comment_colour)
         # regex for anything from hashtag till end of line
-        self.highlighter.set_mapping(r'#.*$', comment_format)
\ No newline at end of file
+        tab.highlighter.set_mapping(r'#.*$', self.highlight_formats["comments"])
\ No newline at end of file
@@ -0,0 +1,91 @@
+import PyQt5.QtWidgets as qtw
+from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal, QEvent, QTimer
+from PyQt5.QtGui import QFont, QFontDatabase, QColor, QSyntaxHighlighter, QTextCharFormat, QIcon, QKeySequence, QTextCursor, QKeyEvent
+from components.profiler import profiler
+import sys
+
+# debug panel showing the profiler's timings and gauges, and how well the tag cache is doing, refreshed every second while open
+class MetricsDialog(qtw.QDialog):
+    def __init__(self, sentence_cache=None):
+        super().__init__()
+        self.sentence_cache = sentence_cache
+        self.window_setup()
+        self.widget_setup()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    # setting up dialog window properties
+    def window_setup(self):
+        self.setWindowTitle("Performance Metrics")
+        width, height = 750, 500
+        self.setMinimumSize(width, height)
+
+        pixmapi = qtw.QStyle.SP_FileDialogInfoView
+        icon = self.style().standardIcon(pixmapi)
+        self.setWindowIcon(icon)
+
+    # setting up layout and widgets within it
+    def widget_setup(self):
+        self.layout = qtw.QVBoxLayout()
+
+        self.status_label = qtw.QLabel()
+        self.layout.addWidget(self.status_label)
+
+        # hits and misses of the cache of tagged sentences, and how much of its size limit it is using
+        self.cache_label = qtw.QLabel()
+        self.layout.addWidget(self.cache_label)
+
+        # one row for each timed hot path
+        self.timings_table = qtw.QTableWidget(0, 6)
+        self.timings_table.setHorizontalHeaderLabels(["Timing", "Count", "Total ms", "Mean ms", "p50 ms", "p99 ms"])
+        self.timings_table.horizontalHeader().setSectionResizeMode(0, qtw.QHeaderView.Stretch)
+        self.layout.addWidget(self.timings_table)
+
+        # one row for each queue depth or other value
+        self.gauges_table = qtw.QTableWidget(0, 3)
+        self.gauges_table.setHorizontalHeaderLabels(["Gauge", "Last", "Max"])
+        self.gauges_table.horizontalHeader().setSectionResizeMode(0, qtw.QHeaderView.Stretch)
+        self.layout.addWidget(self.gauges_table)
+
+        self.reset_button = qtw.QPushButton("Reset", self)
+        self.reset_button.clicked.connect(self.reset)
+        self.layout.addWidget(self.reset_button)
+
+        self.setLayout(self.layout)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
+
+    # filling the tables from the profiler's latest summary
+    def refresh(self):
+        self.status_label.setText("Profiling is on" if profiler.enabled else "Profiling is off, turn it on from the View menu")
+        if self.sentence_cache is not None:
+            cache = self.sentence_cache.stats()
+            self.cache_label.setText(f"Tag cache: {cache['hits']} hits, {cache['misses']} misses "
+                f"({cache['hit_rate']:.1%} hit rate), {cache['entries']} sentences, "
+                f"{cache['size'] / (1024 * 1024):.1f} of {cache['max_bytes'] / (1024 * 1024):.0f} MB")
+        summary = profiler.summary()
+
+        self.timings_table.setRowCount(len(summary["timings"]))
+        for row, (name, timing) in enumerate(summary["timings"].items()):
+            values = [name, str(timing["count"]), f"{timing['total_ms']:.2f}", f"{timing['mean_ms']:.3f}",
+                f"{timing['p50_ms']:.3f}", f"{timing['p99_ms']:.3f}"]
+            for column, value in enumerate(values):
+                self.timings_table.setItem(row, column, qtw.QTableWidgetItem(value))
+
+        self.gauges_table.setRowCount(len(summary["gauges"]))
+        for row, (name, gauge) in enumerate(summary["gauges"].items()):
+            for column, value in enumerate([name, str(gauge["last"]), str(gauge["max"])]):
+                self.gauges_table.setItem(row, column, qtw.QTableWidgetItem(value))
@@ -0,0 +1,46 @@
+import PyQt5.QtWidgets as qtw
+
+# panel listing the words used too often close together, most overused first
+# left open (not modal) and refreshed from the repetition detector's counts as the text changes
+class OveruseDialog(qtw.QDialog):
+    def __init__(self, overused):
+        super().__init__()
+
+        self.window_setup()
+        self.widget_setup()
+        self.update_overused(overused)
+
+    # setting up dialog window properties
+    def window_setup(self):
+        self.setWindowTitle("Overused Words")
+        width, height = 350, 450
+        self.setMinimumSize(width, height)
+
+        pixmapi = qtw.QStyle.SP_FileDialogInfoView
+        icon = self.style().standardIcon(pixmapi)
+        self.setWindowIcon(icon)
+
+    # setting up layout and widgets within it
+    def widget_setup(self):
+        self.layout = qtw.QVBoxLayout()
+
+        self.info_label = qtw.QLabel("Words used more than once in a line, or several times in nearby lines")
+        self.info_label.setWordWrap(True)
+        self.layout.addWidget(self.info_label)
+
+        # one row for each word, with the number of places it is repeated and how often it is used in total
+        self.word_table = qtw.QTableWidget(0, 3, self)
+        self.word_table.setHorizontalHeaderLabels(["Word", "Repeated In", "Uses"])
+        self.word_table.verticalHeader().hide()
+        self.word_table.setEditTriggers(qtw.QAbstractItemView.NoEditTriggers)
+        self.word_table.horizontalHeader().setSectionResizeMode(0, qtw.QHeaderView.Stretch)
+        self.layout.addWidget(self.word_table)
+
+        self.setLayout(self.layout)
+
+    # refreshing the table with the latest ranking, as (word, places repeated, uses) from most to least overused
+    def update_overused(self, overused):
+        self.word_table.setRowCount(len(overused))
+        for row, (word, repeated, uses) in enumerate(overused):
+            for column, value in enumerate((word, str(repeated), str(uses))):
+                self.word_table.setItem(row, column, qtw.QTableWidgetItem(value))
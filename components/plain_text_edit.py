@@ -0,0 +1,13 @@
+import PyQt5.QtWidgets as qtw
+from PyQt5.QtGui import QKeyEvent
+from components.text_edit import close_brackets
+
+# plain text editor used for very long documents, it lays out and paints only the blocks being shown
+# so scrolling and typing stay smooth, but text can't be given its own bold or italic formatting
+class QPlainTextEdit(qtw.QPlainTextEdit):
+    # overriding method in case of some events
+    def keyPressEvent(self, event: QKeyEvent) -> None:
+        if close_brackets(self, event):
+            return
+        # otherwise falling back to default super method of parent class
+        return super().keyPressEvent(event)
@@ -0,0 +1,49 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+from components.taggers import make_tagger, warm_up
+
+# these functions run in the pool's worker processes, so they are kept at module level to be picklable
+
+# tagging a shard of sentences with the named backend, each given as a list of words, returning a list of (word, tag) lists
+def tag_sentences(sentences, tagger=None):
+    backend = make_tagger(tagger)
+    return [backend.tag(words) for words in sentences]
+
+# default number of processes, leaving one core for the gui
+def default_process_count():
+    return max(1, (os.cpu_count() or 2) - 1)
+
+# pool of processes for tagging large amounts of text on more than one core
+# the pool is only started the first time it is needed
+class ProcessTagger:
+    def __init__(self, processes=None, tagger=None):
+        self.processes = default_process_count() if processes is None else processes
+        # backend the processes load when they start, others are loaded the first time they're asked for
+        self.tagger = tagger
+        self.executor = None
+
+    def enabled(self):
+        return self.processes > 1
+
+    # starting the processes if they aren't running yet, spawned rather than forked as the gui process has threads
+    # each process loads the tagger model when it starts, before any real work arrives
+    def pool(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"), initializer=warm_up, initargs=(self.tagger,))
+        return self.executor
+
+    # changing the number of processes, the pool is restarted with the new size when next needed
+    def set_processes(self, processes):
+        if processes != self.processes:
+            self.shutdown()
+            self.processes = processes
+
+    def submit(self, sentences, tagger=None):
+        return self.pool().submit(tag_sentences, sentences, tagger)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
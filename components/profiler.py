@@ -0,0 +1,118 @@
+from collections import deque
+import functools
+import json
+import os
+import threading
+import time
+from components import startup
+
+# lightweight timing of the editor's hot paths, off unless turned on from the view menu or with CODEY_PROFILE=1
+# while off each instrumented call only costs a check of one attribute
+class Profiler:
+    def __init__(self, enabled=False, samples=1000, trace_events=100000):
+        self.enabled = enabled
+        self.samples = samples
+        self.lock = threading.Lock()
+        # when timing started, trace timestamps are relative to this
+        self.origin = time.perf_counter()
+        self.reset(trace_events)
+
+    def reset(self, trace_events=None):
+        with self.lock:
+            # name -> [count, total seconds, recent durations]
+            self.timings = {}
+            # name -> [last value, max value, number of samples]
+            self.gauges = {}
+            self.trace = deque(maxlen=trace_events or self.trace.maxlen)
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+    # recording one timed call, start and end from time.perf_counter
+    def record(self, name, start, end):
+        duration = end - start
+        with self.lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = [0, 0.0, deque(maxlen=self.samples)]
+            timing[0] += 1
+            timing[1] += duration
+            timing[2].append(duration)
+            self.trace.append({"name": name, "ph": "X", "ts": (start - self.origin) * 1e6, "dur": duration * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident()})
+
+    # recording a value such as a queue depth
+    def gauge(self, name, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            gauge = self.gauges.get(name)
+            if gauge is None:
+                gauge = self.gauges[name] = [value, value, 0]
+            gauge[0] = value
+            gauge[1] = max(gauge[1], value)
+            gauge[2] += 1
+            self.trace.append({"name": name, "ph": "C", "ts": (time.perf_counter() - self.origin) * 1e6,
+                "pid": os.getpid(), "args": {"value": value}})
+
+    # timing a block of code, with profiler.span("name"):
+    def span(self, name):
+        return Span(self, name)
+
+    # summary of every timing and gauge, times in milliseconds
+    def summary(self):
+        with self.lock:
+            timings = {name: (count, total, sorted(durations)) for name, (count, total, durations) in self.timings.items()}
+            gauges = {name: list(gauge) for name, gauge in self.gauges.items()}
+        result = {"timings": {}, "gauges": {}}
+        for name, (count, total, durations) in sorted(timings.items()):
+            result["timings"][name] = {"count": count, "total_ms": total * 1000, "mean_ms": total / count * 1000,
+                "p50_ms": percentile(durations, 50) * 1000, "p99_ms": percentile(durations, 99) * 1000}
+        for name, (last, highest, count) in sorted(gauges.items()):
+            result["gauges"][name] = {"last": last, "max": highest, "count": count}
+        return result
+
+    # writing the recorded calls as a chrome trace (viewable in chrome://tracing or perfetto) with the summary alongside
+    def export_trace(self, filename):
+        with self.lock:
+            events = list(self.trace)
+        with open(filename, 'w') as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {**self.summary(), "startup": startup.report()}}, file)
+
+class Span:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter() if self.profiler.enabled else None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+# value below which the given percentage of sorted durations fall
+def percentile(durations, percent):
+    if not durations:
+        return 0.0
+    return durations[min(len(durations) - 1, int(len(durations) * percent / 100))]
+
+# the profiler shared by the whole app
+profiler = Profiler(enabled=os.environ.get("CODEY_PROFILE") == "1")
+
+# decorator timing every call of a function or method under the given name while the profiler is on
+def instrumented(name):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.record(name, start, time.perf_counter())
+        return wrapper
+    return decorator
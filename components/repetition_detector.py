@@ -0,0 +1,152 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from components.tag_store import block_id
+from collections import Counter
+import heapq
+
+# common words that are expected to be used over and over, never counted as repetition
+STOP_WORDS = frozenset("""
+a about after again all also am an and any are as at be because been before being but by can could did do does
+doing down for from had has have having he her here hers him his how i if in into is it its just me more most my
+no nor not now of off on once only or other our out over own she should so some such than that the their them
+then there these they this those through to too under until up very was we were what when where which while who
+whom why will with would you your
+""".split())
+
+# finds words used too often close together, kept up to date from the same block changes the stats use
+# each block has counts of its words, a word is repeated in a block if it is used there more than once,
+# or enough times in a window of the blocks around it within the same paragraph (paragraphs end at blank lines)
+# so an edit only means counting the changed blocks and checking the windows that include them
+class RepetitionDetector(QObject):
+    # emitted with the ids of blocks whose repeated words changed, so only they are highlighted again
+    repeats_changed = pyqtSignal(object)
+    # emitted with the most overused words whenever they may have changed
+    overuse_changed = pyqtSignal(object)
+
+    def __init__(self, tag_store, block_limit=2, window_limit=3, window=2):
+        super().__init__()
+        self.tag_store = tag_store
+        # uses of a word in one block, or in the blocks up to window either side of it, that count as repetition
+        self.block_limit = block_limit
+        self.window_limit = window_limit
+        self.window = window
+        # block id -> set of lower case repeated words in that block, shared with the highlighter so cleared in place
+        self.block_repeats = {}
+        self.clear()
+        tag_store.cleared.connect(self.clear)
+        tag_store.blocks_changed.connect(self.handle_blocks_changed)
+        # several changes in a row are only sent out once, when the event loop is next free rather than in the middle of an edit
+        self.emit_timer = QTimer(self)
+        self.emit_timer.setSingleShot(True)
+        self.emit_timer.setInterval(0)
+        self.emit_timer.timeout.connect(self.emit_changes)
+
+    def clear(self):
+        # block id -> counter of lower case words in the block
+        self.block_counts = {}
+        self.block_repeats.clear()
+        # uses of each word across the document, and number of blocks each word is repeated in
+        self.word_counts = Counter()
+        self.repeat_counts = Counter()
+        # blocks to highlight again
+        self.changed_blocks = set()
+
+    def handle_blocks_changed(self, texts, tokens, removed):
+        for removed_id in removed:
+            self.update_counts(removed_id, Counter())
+            self.update_repeats(removed_id, set())
+        for changed_id, block_tokens in tokens.items():
+            self.update_counts(changed_id, Counter(word for word in (token.lower() for token in block_tokens)
+                if len(word) > 2 and word not in STOP_WORDS))
+        if texts:
+            self.update_run(texts)
+        self.emit_timer.start()
+
+    # checking again every block whose window could include one of the changed blocks, or have been cut short by one
+    # becoming blank, the changed blocks come from one edit so are a run of blocks in document order
+    # the blocks around the run are gone through once, keeping their counts in a list so each window is a slice of it
+    def update_run(self, texts):
+        block_ids = list(texts)
+        first = self.tag_store.find_block(block_ids[0])
+        last = self.tag_store.find_block(block_ids[-1])
+        if first is None or last is None:
+            return
+        # blocks up to window either side of the run are checked, and need the blocks up to window either side of them
+        for _ in range(2 * self.window):
+            if first.previous().isValid():
+                first = first.previous()
+            if last.next().isValid():
+                last = last.next()
+        rows = []
+        block = first
+        while block.isValid():
+            other_id = block_id(block)
+            text = texts.get(other_id)
+            blank = not (text if text is not None else block.text()).strip()
+            rows.append((other_id, None if blank else self.block_counts.get(other_id) or {}))
+            if block == last:
+                break
+            block = block.next()
+        # rows that are checked, leaving out the extra ones at each end unless they are the ends of the document
+        start = 0 if not first.previous().isValid() else self.window
+        end = len(rows) if not last.next().isValid() else len(rows) - self.window
+        for index in range(start, end):
+            other_id, counts = rows[index]
+            if other_id is not None:
+                self.update_repeats(other_id, self.find_repeats(counts, window_rows(rows, index, self.window)))
+
+    def update_counts(self, block_id, counts):
+        old_counts = self.block_counts.pop(block_id, Counter())
+        if counts:
+            self.block_counts[block_id] = counts
+        self.word_counts.update(counts)
+        self.word_counts.subtract(old_counts)
+        for word in old_counts.keys() - counts.keys():
+            if self.word_counts[word] <= 0:
+                del self.word_counts[word]
+
+    def update_repeats(self, block_id, repeats):
+        old_repeats = self.block_repeats.pop(block_id, set())
+        if repeats:
+            self.block_repeats[block_id] = repeats
+        if repeats != old_repeats:
+            self.repeat_counts.update(repeats - old_repeats)
+            self.repeat_counts.subtract(old_repeats - repeats)
+            for word in old_repeats - repeats:
+                if self.repeat_counts[word] <= 0:
+                    del self.repeat_counts[word]
+            self.changed_blocks.add(block_id)
+
+    # the words used too often in a block, by itself or within the counts of its window (the block's own counts first)
+    # only words also used in another block of the window can reach the window limit, so only those are added up
+    def find_repeats(self, counts, window_counts):
+        if not counts:
+            return set()
+        repeats = {word for word, count in counts.items() if count >= self.block_limit}
+        shared = set()
+        for other in window_counts[1:]:
+            shared.update(counts.keys() & other.keys())
+        repeats.update(word for word in shared - repeats
+            if sum(other.get(word, 0) for other in window_counts) >= self.window_limit)
+        return repeats
+
+    def emit_changes(self):
+        if self.changed_blocks:
+            changed, self.changed_blocks = self.changed_blocks, set()
+            self.repeats_changed.emit(changed)
+        self.overuse_changed.emit(self.overused())
+
+    # the words repeated in the most places, as (word, blocks it is repeated in, uses in the document)
+    # ranked from the repeat counts kept as blocks change, so it only goes through the words and not the text
+    def overused(self, limit=20):
+        ranked = heapq.nlargest(limit, self.repeat_counts.items(), key=lambda item: (item[1], self.word_counts[item[0]]))
+        return [(word, count, self.word_counts[word]) for word, count in ranked]
+
+# counts of a row and the rows up to window either side of it, stopping at blank rows which end a paragraph
+def window_rows(rows, index, window):
+    window_counts = [rows[index][1]]
+    for step in (-1, 1):
+        other = index + step
+        while 0 <= other < len(rows) and abs(other - index) <= window and rows[other][1] is not None:
+            window_counts.append(rows[other][1])
+            other += step
+    return window_counts
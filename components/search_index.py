@@ -0,0 +1,197 @@
+from PyQt5.QtCore import QObject
+from PyQt5.QtGui import QTextCursor
+from components.tokens import tokenise
+from components.tag_store import BlockData
+from components.block_word_index import BlockWordIndex
+import bisect
+import re
+
+# index of which blocks each word is used in, kept up to date from the same block changes the stats use
+# so finding a word only has to look at the blocks that contain it instead of the whole text
+class SearchIndex(QObject):
+    def __init__(self, tag_store):
+        super().__init__()
+        self.tag_store = tag_store
+        # the text being searched for with its whole word and regular expression options, and the compiled pattern
+        self.query = ("", False, False)
+        self.pattern = None
+        # lower case word -> set of ids of the blocks it is in
+        self.words = BlockWordIndex(fold_case=True)
+        # counting stops at this many matches, past it the exact number isn't worth searching the whole document for
+        self.count_limit = 10000
+        self.clear()
+        tag_store.cleared.connect(self.clear)
+        tag_store.blocks_changed.connect(self.handle_blocks_changed)
+
+    def clear(self):
+        self.words.clear()
+        # block id -> number of matches in the block, kept until the block or the query changes
+        self.block_counts = {}
+        self.forget_matches()
+
+    # the candidate blocks and the total are worked out again the next time they're needed after any change
+    def forget_matches(self):
+        self.candidates = None
+        self.ordered = None
+        self.total = None
+
+    def handle_blocks_changed(self, texts, tokens, removed):
+        for block_id in removed:
+            self.words.index_block(block_id, ())
+            self.block_counts.pop(block_id, None)
+        for block_id, block_tokens in tokens.items():
+            self.words.index_block(block_id, block_tokens)
+            self.block_counts.pop(block_id, None)
+        self.forget_matches()
+
+    # setting what is being searched for, raises re.error for an invalid regular expression
+    def set_query(self, text, whole_word=False, case_sensitive=False, regex=False):
+        self.query = (text, whole_word, regex)
+        self.pattern = search_pattern(text, whole_word, case_sensitive, regex) if text else None
+        self.block_counts = {}
+        self.forget_matches()
+
+    # ids of the blocks that can contain a match, or None if every block has to be searched (eg a regular expression)
+    # every word of the query has to be in the block, as a whole word or part of a word
+    def candidate_ids(self):
+        if self.candidates is None:
+            text, whole_word, regex = self.query
+            words = [word.lower() for word in tokenise(text)]
+            if regex or not words:
+                return None
+            candidates = None
+            for word in words:
+                if whole_word:
+                    blocks = self.words.word_blocks.get(word, set())
+                else:
+                    blocks = set()
+                    # the vocabulary is far smaller than the text, so looking through it for partial words is quick
+                    for indexed_word, word_blocks in self.words.word_blocks.items():
+                        if word in indexed_word:
+                            blocks |= word_blocks
+                candidates = blocks if candidates is None else candidates & blocks
+                if not candidates:
+                    break
+            self.candidates = candidates
+        return self.candidates
+
+    # the blocks that can contain a match from first to last (or the end of the document), going backwards if asked
+    # blocks are only searched as they are reached, so a search can stop at the first block with a match
+    def search_blocks(self, first, last=None, backward=False):
+        candidates = self.candidate_ids()
+        if candidates is not None and len(candidates) * 8 < self.tag_store.block_count:
+            # few blocks can match, so going through them in order is quicker than going through the whole document
+            numbers, blocks = self.ordered_candidates()
+            first_number = first.blockNumber()
+            if last is None or not last.isValid():
+                last_number = 0 if backward else self.tag_store.block_count
+            else:
+                last_number = last.blockNumber()
+            if backward:
+                yield from reversed(blocks[bisect.bisect_left(numbers, last_number):bisect.bisect_right(numbers, first_number)])
+            else:
+                yield from blocks[bisect.bisect_left(numbers, first_number):bisect.bisect_right(numbers, last_number)]
+            return
+        block = first
+        while block.isValid():
+            data = block.userData()
+            if candidates is None or (isinstance(data, BlockData) and data.block_id in candidates):
+                yield block
+            if last is not None and block == last:
+                return
+            block = block.previous() if backward else block.next()
+
+    # the candidate blocks in document order, with their block numbers, kept until the document or query changes
+    def ordered_candidates(self):
+        if self.ordered is None:
+            blocks = [block for block in (self.tag_store.find_block(block_id) for block_id in self.candidates) if block is not None]
+            numbered = sorted((block.blockNumber(), block) for block in blocks)
+            self.ordered = ([number for number, block in numbered], [block for number, block in numbered])
+        return self.ordered
+
+    # every match in the document as (position, length, match), in order
+    def matches(self):
+        if self.pattern is None:
+            return []
+        return [match for block in self.search_blocks(self.tag_store.document.begin()) for match in self.block_matches(block)]
+
+    # the number of matches in the document, up to count_limit
+    # only blocks that changed since the last count are searched again, the rest use the count kept for them
+    def match_count(self):
+        if self.pattern is None:
+            return 0
+        if self.total is None:
+            total = 0
+            for block in self.search_blocks(self.tag_store.document.begin()):
+                data = block.userData()
+                count = self.block_counts.get(data.block_id) if isinstance(data, BlockData) else None
+                if count is None:
+                    count = sum(1 for match in self.pattern.finditer(block.text()) if match.end() > match.start())
+                    if isinstance(data, BlockData):
+                        self.block_counts[data.block_id] = count
+                total += count
+                if total >= self.count_limit:
+                    break
+            self.total = min(total, self.count_limit)
+        return self.total
+
+    # matches in blocks with numbers between first and last, for highlighting the ones being shown
+    def matches_between(self, first_number, last_number):
+        if self.pattern is None:
+            return []
+        document = self.tag_store.document
+        blocks = self.search_blocks(document.findBlockByNumber(first_number), document.findBlockByNumber(last_number))
+        return [match for block in blocks for match in self.block_matches(block)]
+
+    def block_matches(self, block):
+        position = block.position()
+        return [(position + match.start(), match.end() - match.start(), match)
+            for match in self.pattern.finditer(block.text()) if match.end() > match.start()]
+
+    # the first match after a position, or the last one before it going backwards, wrapping around the document
+    # searching outwards from the block the position is in, so only the blocks up to the match are searched
+    def next_match(self, position, backward=False):
+        if self.pattern is None:
+            return None
+        document = self.tag_store.document
+        start = document.findBlock(position)
+        for block in self.search_blocks(start, backward=backward):
+            matches = self.block_matches(block)
+            if block == start:
+                matches = [match for match in matches if (match[0] < position if backward else match[0] >= position)]
+            if matches:
+                return matches[-1] if backward else matches[0]
+        # wrapping around to the other end of the document, back as far as the block the search started in
+        for block in self.search_blocks(document.lastBlock() if backward else document.begin(), start, backward):
+            matches = self.block_matches(block)
+            if matches:
+                return matches[-1] if backward else matches[0]
+        return None
+
+    # the replacement text for a match, with groups filled in for regular expressions
+    def replacement_text(self, match, replacement):
+        return match.expand(replacement) if self.query[2] else replacement
+
+    # replacing every match in one edit block, so it is a single undo step and the document reports one change
+    # going from the end backwards so the positions of matches not yet replaced don't move
+    def replace_all(self, replacement):
+        matches = self.matches()
+        if not matches:
+            return 0
+        # working out every replacement first, so an invalid one stops before anything has changed
+        replacements = [(position, length, self.replacement_text(match, replacement)) for position, length, match in matches]
+        cursor = QTextCursor(self.tag_store.document)
+        cursor.beginEditBlock()
+        for position, length, text in reversed(replacements):
+            cursor.setPosition(position)
+            cursor.setPosition(position + length, QTextCursor.KeepAnchor)
+            cursor.insertText(text)
+        cursor.endEditBlock()
+        return len(matches)
+
+# the pattern for a query, whole words follow the same rules as words for tagging so "don" doesn't match in "don't"
+def search_pattern(text, whole_word=False, case_sensitive=False, regex=False):
+    source = text if regex else re.escape(text)
+    if whole_word:
+        source = rf"(?<![\w'’])(?:{source})(?!\w|['’]\w)"
+    return re.compile(source, 0 if case_sensitive else re.IGNORECASE)
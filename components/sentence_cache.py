@@ -0,0 +1,100 @@
+from collections import OrderedDict
+import hashlib
+import threading
+
+# key for a sentence, a hash of its words so differences in spacing don't matter
+# along with the name of the tagger, so tags from a tagger that gives different results are never mixed up
+def sentence_key(words, tagger=""):
+    return hashlib.blake2b((tagger + "\x1e" + "\x1f".join(words)).encode("utf-8"), digest_size=16).digest()
+
+# rough number of bytes an entry takes up, the key plus a tuple of (word, category) pairs
+def entry_size(tags):
+    return 120 + sum(130 + len(word) for word, category in tags)
+
+# least recently used cache of tagged sentences, bounded by an estimate of the memory it uses
+# used from the worker thread and read from the gui thread, so access is behind a lock
+class SentenceCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024, backing=None):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        # optional disk cache that misses are loaded from and new entries are written to
+        self.backing = backing
+        self.unsaved = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    # getting the tags for a sentence key, or None if it hasn't been tagged
+    def get(self, key):
+        with self.lock:
+            tags = self.entries.get(key)
+            if tags is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return tags
+
+    # checking if a sentence has been tagged, without counting as a hit or miss
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    # adding the tags for a sentence, dropping the least recently used ones once over the size limit
+    def put(self, key, tags):
+        with self.lock:
+            if key in self.entries:
+                self.size -= entry_size(self.entries.pop(key))
+            self.entries[key] = tags
+            self.size += entry_size(tags)
+            if self.backing is not None:
+                self.unsaved[key] = tags
+            self.evict()
+
+    # loading the entries for any keys not in memory from the disk cache in one go, without counting hits or misses
+    def prefetch(self, keys):
+        if self.backing is None:
+            return
+        with self.lock:
+            missing = {key for key in keys if key not in self.entries}
+        if not missing:
+            return
+        found = self.backing.get_many(missing)
+        with self.lock:
+            for key, tags in found.items():
+                if key not in self.entries:
+                    self.entries[key] = tags
+                    self.size += entry_size(tags)
+            self.evict()
+
+    # writing entries added since the last flush to the disk cache
+    def flush(self):
+        if self.backing is None:
+            return
+        with self.lock:
+            unsaved, self.unsaved = self.unsaved, {}
+        self.backing.put_many(unsaved)
+
+    # changing the size limit, eg from settings
+    def set_max_bytes(self, max_bytes):
+        with self.lock:
+            self.max_bytes = max_bytes
+            self.evict()
+
+    def evict(self):
+        while self.size > self.max_bytes and self.entries:
+            key, tags = self.entries.popitem(last=False)
+            self.size -= entry_size(tags)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    # counters for how well the cache is doing
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self.entries), "size": self.size, "max_bytes": self.max_bytes}
@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+
+# timings of each stage of starting up, in seconds from when run.py started
+# printed once the first tags are highlighted if CODEY_STARTUP_REPORT=1, to keep track of time to interactive
+start = time.perf_counter()
+marks = {}
+reported = False
+
+# setting when timing started, run.py passes the time from before anything was imported
+def begin(start_time):
+    global start
+    start = start_time
+
+# recording a stage the first time it is reached
+def mark(name):
+    if name not in marks:
+        marks[name] = time.perf_counter() - start
+        if name == "first_highlight":
+            maybe_report()
+
+def report():
+    return dict(sorted(marks.items(), key=lambda mark: mark[1]))
+
+def maybe_report():
+    global reported
+    if reported or os.environ.get("CODEY_STARTUP_REPORT") != "1":
+        return
+    reported = True
+    print("startup timings:", file=sys.stderr)
+    for name, seconds in report().items():
+        print(f"  {name:<18} {seconds * 1000:8.1f} ms", file=sys.stderr)
@@ -7,6 +7,12 @@ class StatsDialog(qtw.QDialog):
     def __init__(self, stats):
         super().__init__()
         # adding more attributes to default constructor, will be passed from gui mainwindow to the dialog
+        self.set_stats(stats)
+
+        self.window_setup()
+        self.widget_setup()
+
+    def set_stats(self, stats):
         self.word_count = stats[0]
         self.char_count = stats[1]
 
@@ -15,8 +21,15 @@ class StatsDialog(qtw.QDialog):
         self.adj_count = stats[4]
         self.adv_count = stats[5]
 
-        self.window_setup()
-        self.widget_setup()
+    # refreshing the labels with new stats while the dialog is open
+    def update_stats(self, stats):
+        self.set_stats(stats)
+        self.word_count_label.setText(f"Word Count: {self.word_count}")
+        self.char_count_label.setText(f"Character Count: {self.char_count}")
+        self.noun_count_label.setText(f"Noun Count: {self.noun_count}")
+        self.verb_count_label.setText(f"Verb Count: {self.verb_count}")
+        self.adj_count_label.setText(f"Adjective Count: {self.adj_count}")
+        self.adv_count_label.setText(f"Adverb Count: {self.adv_count}")
 
     # setting up dialog window properties
     def window_setup(self):
@@ -0,0 +1,126 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from components.tagging import count_categories
+from collections import Counter
+
+# keeps document statistics up to date as blocks change, using the categories already worked out by background tagging
+# so the numbers are always ready without going through the whole text
+class StatsEngine(QObject):
+    # emitted with the latest stats, in the order the stats dialog takes them
+    stats_changed = pyqtSignal(object)
+
+    def __init__(self, tag_store):
+        super().__init__()
+        self.tag_store = tag_store
+        self.clear()
+        tag_store.cleared.connect(self.clear)
+        tag_store.blocks_changed.connect(self.handle_blocks_changed)
+        tag_store.tags_changed.connect(self.handle_tags_changed)
+        tag_store.block_tags_changed.connect(self.handle_block_tags_changed)
+        # several changes in a row only send out the stats once, when the event loop is next free
+        self.emit_timer = QTimer(self)
+        self.emit_timer.setSingleShot(True)
+        self.emit_timer.setInterval(0)
+        self.emit_timer.timeout.connect(lambda: self.stats_changed.emit(self.stats()))
+
+    def clear(self):
+        # block id -> number of words (split on whitespace), and block id -> counter of tokens used for part of speech counts
+        self.block_word_counts = {}
+        self.block_tokens = {}
+        self.word_count = 0
+        # occurrences of each token across the document, and occurrences of each category
+        self.token_counts = Counter()
+        self.category_counts = Counter()
+        # block id -> (counter of categories given by the block's own tags, counter of the tokens they were given to)
+        # the same way the highlighter colours them, the other uses of each token are counted under its category across
+        # the document instead
+        self.block_counts = {}
+        self.tagged_counts = Counter()
+        # category the untagged uses of each token were counted under, kept in step with the tag store
+        self.word_categories = {}
+
+    # updating counts for changed blocks (block id -> text, and block id -> tokens) and taking away counts for removed blocks
+    def handle_blocks_changed(self, texts, tokens, removed):
+        for block_id in removed:
+            self.update_block(block_id, 0, Counter())
+        for block_id, text in texts.items():
+            self.update_block(block_id, len(text.split()), Counter(tokens[block_id]))
+        self.emit_timer.start()
+
+    def update_block(self, block_id, word_count, tokens):
+        self.word_count += word_count - self.block_word_counts.pop(block_id, 0)
+        if word_count:
+            self.block_word_counts[block_id] = word_count
+        old_tokens = self.block_tokens.pop(block_id, NO_COUNTS[1])
+        if tokens:
+            self.block_tokens[block_id] = tokens
+        self.count_untagged(update_counter(self.token_counts, old_tokens, tokens))
+        self.count_block(block_id)
+
+    # counting the categories of a block again from its tokens and its own tags
+    def count_block(self, block_id):
+        old_categories, old_tagged = self.block_counts.pop(block_id, NO_COUNTS)
+        tokens = self.block_tokens.get(block_id)
+        tags = self.tag_store.block_tags.get(block_id)
+        categories, tagged = count_categories(tokens, tags) if tokens and tags else NO_COUNTS
+        if categories:
+            self.block_counts[block_id] = (categories, tagged)
+        self.category_counts.update(categories)
+        self.category_counts.subtract(old_categories)
+        self.count_untagged((word, -delta) for word, delta in update_counter(self.tagged_counts, old_tagged, tagged))
+
+    # adding changes to the untagged uses of tokens, as (token, change), to the counts of their categories
+    def count_untagged(self, changes):
+        word_categories = self.word_categories
+        for word, delta in changes:
+            category = word_categories.get(word)
+            if category is not None:
+                self.category_counts[category] += delta
+
+    # blocks given new tags of their own are counted again
+    def handle_block_tags_changed(self, block_ids):
+        for block_id in block_ids:
+            if block_id in self.block_tokens:
+                self.count_block(block_id)
+        self.emit_timer.start()
+
+    # moving the counts of untagged words whose category changed from their old category to the new one
+    def handle_tags_changed(self, words):
+        for word in words:
+            count = self.token_counts.get(word, 0) - self.tagged_counts.get(word, 0)
+            old_category = self.word_categories.pop(word, None)
+            category = self.tag_store.word_categories.get(word)
+            if old_category is not None:
+                self.category_counts[old_category] -= count
+            if category is not None:
+                self.word_categories[word] = category
+                self.category_counts[category] += count
+        self.emit_timer.start()
+
+    # word count, character count, verb count, noun count, adjective count, adverb count
+    def stats(self):
+        document = self.tag_store.document
+        char_count = document.characterCount() - 1 if document is not None else 0
+        return [self.word_count, char_count, self.category_counts["verbs"], self.category_counts["nouns"],
+            self.category_counts["adjs"], self.category_counts["adverbs"]]
+
+# counts for a block with no tokens or tags, shared so never changed
+NO_COUNTS = (Counter(), Counter())
+
+# changing a counter from holding old counts to holding new ones, returning the (key, change) of each key that changed
+# looked up with get rather than indexing the counters, which is much slower for missing keys
+def update_counter(counter, old_counts, counts):
+    changes = []
+    for key, count in counts.items():
+        delta = count - old_counts.get(key, 0)
+        if delta:
+            changes.append((key, delta))
+    for key, count in old_counts.items():
+        if key not in counts:
+            changes.append((key, -count))
+    for key, delta in changes:
+        total = counter.get(key, 0) + delta
+        if total > 0:
+            counter[key] = total
+        else:
+            counter.pop(key, None)
+    return changes
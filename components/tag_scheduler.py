@@ -0,0 +1,94 @@
+from components.worker_thread import WorkerThread
+from components.profiler import profiler
+
+from PyQt5.QtCore import QObject, QTimer
+
+# schedules background tagging only when a document has changed
+# bursts of edits are coalesced by restarting a single shot timer on every change
+# one worker is shared by every open document, only the active document is tagged, the others keep their changed
+# blocks marked until they are active again
+class TagScheduler(QObject):
+    def __init__(self, tag_store=None, debounce_ms=300, cache=None, process_tagger=None, tagger=None):
+        super().__init__()
+        self.stores = []
+        self.active_store = None
+        self.generation = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.flush)
+
+        # one worker thread reused for every job, it sleeps until a job is submitted
+        # not started until start is called, so loading the tagger can wait until the window is showing
+        self.worker = WorkerThread(cache, process_tagger, tagger)
+
+        if tag_store is not None:
+            self.add_store(tag_store)
+            self.set_active(tag_store)
+
+    # starting the worker thread, jobs submitted before this wait in its queue
+    def start(self):
+        if not self.worker.isRunning():
+            self.worker.start()
+
+    # tag stores of the open documents, results from the worker are shared out between them
+    def add_store(self, tag_store):
+        self.stores.append(tag_store)
+        tag_store.dirtied.connect(self.handle_dirtied)
+
+    def remove_store(self, tag_store):
+        tag_store.dirtied.disconnect(self.handle_dirtied)
+        self.stores.remove(tag_store)
+        if tag_store is self.active_store:
+            self.active_store = None
+
+    # switching which document is tagged, anything changed while it was in the background is tagged now
+    def set_active(self, tag_store):
+        self.active_store = tag_store
+        if tag_store is not None and tag_store.dirty:
+            self.schedule()
+
+    def handle_dirtied(self):
+        if self.sender() is self.active_store:
+            self.schedule()
+
+    # changing how long to wait after the last edit before tagging
+    def set_debounce(self, debounce_ms):
+        self.timer.setInterval(debounce_ms)
+
+    # switching to another tagger backend and tagging every document again with it, background documents
+    # are tagged when they are next active
+    def set_tagger(self, name):
+        if name == self.worker.tagger_name:
+            return
+        self.worker.set_tagger(name)
+        for tag_store in self.stores:
+            tag_store.mark_all_dirty()
+
+    # (re)starting the timer, so tagging waits until edits have paused
+    def schedule(self):
+        self.timer.start()
+
+    # sending the blocks that changed to the worker, which drops any older job still running
+    def flush(self):
+        if self.active_store is None:
+            return
+        blocks = self.active_store.take_dirty(self.generation + 1)
+        profiler.gauge("scheduler.dirty_blocks", len(blocks))
+        if not blocks:
+            return
+        self.generation += 1
+        # the tags each block has now, so the worker can send back just what changes
+        block_tags = self.active_store.block_tags
+        self.worker.submit(self.generation, blocks, {block_id: block_tags.get(block_id) for block_id in blocks})
+
+    # merging results into the stores, block ids are unique across documents so each store only takes its own blocks
+    def apply_results(self, results):
+        for tag_store in self.stores:
+            tag_store.apply_results(results)
+
+    # stopping the worker thread, used when the app is closing
+    def stop(self):
+        self.timer.stop()
+        self.worker.stop()
@@ -0,0 +1,243 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QTextBlockUserData
+from components.tokens import tokenise
+from components.tagging import majority_category
+from components.block_word_index import BlockWordIndex
+from collections import Counter
+import itertools
+
+# the part of speech categories that get highlighted, in the same order as the highlighting conditions
+CATEGORIES = ("verbs", "nouns", "adjs", "adverbs")
+
+# data attached to each block of the document so a block keeps the same id while text around it changes
+class BlockData(QTextBlockUserData):
+    def __init__(self, block_id):
+        super().__init__()
+        self.block_id = block_id
+
+# persistent store of part of speech tags for each block of a document
+# listens to the document changing and keeps track of which blocks need to be tagged again
+class TagStore(QObject):
+    # emitted with the set of words whose category changed after new results were merged in
+    tags_changed = pyqtSignal(object)
+    # emitted with the ids of blocks given new tags of their own, which are used for their words before the categories
+    block_tags_changed = pyqtSignal(object)
+    # emitted whenever a block is marked as needing to be tagged
+    dirtied = pyqtSignal()
+    # emitted with the text of blocks that changed (block id -> text), their tokens (block id -> list of tokens) and the
+    # ids of blocks that were removed, each block is only tokenised here so everything listening shares the tokens
+    blocks_changed = pyqtSignal(object, object, object)
+    # emitted when the store forgets everything, eg a new document
+    cleared = pyqtSignal()
+
+    # ids are shared across documents so results from an old document can never match a new one
+    _ids = itertools.count()
+
+    def __init__(self, document=None):
+        super().__init__()
+        self.document = None
+        # sets of words for each category, updated in place so others can keep a reference to them
+        self.categories = {category: set() for category in CATEGORIES}
+        self.reset()
+        self.set_document(document)
+
+    # forgetting all tags, keeping the same category set objects
+    def reset(self):
+        # block id -> {word: category} for the words tagged in that block, cleared in place as the highlighter shares it
+        if not hasattr(self, "block_tags"):
+            self.block_tags = {}
+        self.block_tags.clear()
+        # block id -> the block itself, checked against the block data before use
+        self.blocks = {}
+        # word -> counter of how many blocks gave each category to that word
+        self.word_counts = {}
+        # word -> the category the word is currently highlighted with, cleared in place as the highlighter shares it
+        if not hasattr(self, "word_categories"):
+            self.word_categories = {}
+        self.word_categories.clear()
+        # which blocks each word is used in, to find the blocks to highlight again when words change category
+        self.words = BlockWordIndex()
+        self.dirty = set()
+        # block id -> generation of the tagging job the block was last sent in, older results for it are ignored
+        self.submitted = {}
+        # block id -> id of the block after it, and the id of the first block, so the ids a change removed can be
+        # found between the blocks either side of it without going through the document
+        self.next_ids = {}
+        self.first_id = None
+        self.block_count = 0
+        for words in self.categories.values():
+            words.clear()
+        self.cleared.emit()
+
+    # connecting to a (new) document and marking all of its blocks as needing tags
+    def set_document(self, document):
+        if self.document is not None:
+            self.document.contentsChange.disconnect(self.on_contents_change)
+        self.reset()
+        self.document = document
+        if document is None:
+            return
+        document.contentsChange.connect(self.on_contents_change)
+        self.on_contents_change(0, 0, document.characterCount())
+
+    # marking every block as needing tags again while keeping the current ones until new results arrive
+    # used when tags would come out differently, eg a different tagger
+    def mark_all_dirty(self):
+        if self.document is not None:
+            self.on_contents_change(0, 0, self.document.characterCount())
+
+    # called by the document whenever text is inserted or removed, marks only the blocks in the changed range
+    # and drops the blocks the change removed
+    def on_contents_change(self, position, chars_removed, chars_added):
+        block = self.document.findBlock(position)
+        last = self.document.findBlock(position + chars_added)
+        before_id = block_id(block.previous())
+        seen = set()
+        texts = {}
+        while block.isValid():
+            data = block.userData()
+            # blocks created by splitting a line have no data yet, giving them a fresh id
+            if not isinstance(data, BlockData) or data.block_id in seen:
+                data = BlockData(next(self._ids))
+                block.setUserData(data)
+            seen.add(data.block_id)
+            self.blocks[data.block_id] = block
+            self.dirty.add(data.block_id)
+            texts[data.block_id] = block.text()
+            if block == last:
+                break
+            block = block.next()
+
+        # the changed range had this many blocks before the change, they were between the same two unchanged blocks
+        block_count = self.document.blockCount()
+        old_ids = []
+        other_id = self.next_ids.get(before_id) if before_id is not None else self.first_id
+        for _ in range(len(texts) - (block_count - self.block_count)):
+            if other_id is None:
+                break
+            old_ids.append(other_id)
+            other_id = self.next_ids.get(other_id)
+        after_id = other_id
+        self.block_count = block_count
+        for old_id in old_ids:
+            self.next_ids.pop(old_id, None)
+        previous_id = before_id
+        for new_id in itertools.chain(texts, [after_id]):
+            if previous_id is None:
+                self.first_id = new_id
+            else:
+                self.next_ids[previous_id] = new_id
+            previous_id = new_id
+
+        removed = set(old_ids) - texts.keys()
+        touched = set()
+        for removed_id in removed:
+            self.forget_block(removed_id, touched)
+        tokens = {changed_id: tokenise(text) for changed_id, text in texts.items()}
+        for changed_id, block_tokens in tokens.items():
+            self.words.index_block(changed_id, block_tokens)
+        self.blocks_changed.emit(texts, tokens, removed)
+        changed = self.update_categories(touched)
+        if changed:
+            self.tags_changed.emit(changed)
+        self.dirtied.emit()
+
+    # getting the block for an id if it is still part of the document
+    def find_block(self, block_id):
+        block = self.blocks.get(block_id)
+        if block is None or not block.isValid():
+            return None
+        data = block.userData()
+        if not isinstance(data, BlockData) or data.block_id != block_id:
+            return None
+        return block
+
+    # dropping everything kept for a block that has been removed from the document, words whose counts changed are
+    # added to touched
+    def forget_block(self, block_id, touched):
+        self.blocks.pop(block_id, None)
+        self.dirty.discard(block_id)
+        self.submitted.pop(block_id, None)
+        self.count_tags(self.block_tags.pop(block_id, {}), -1, touched)
+        self.words.index_block(block_id, ())
+
+    # taking the text of every block that needs tagging, as a dict of block id -> text
+    # the blocks are remembered as sent in the given generation of tagging job
+    def take_dirty(self, generation=None):
+        if self.document is None:
+            return {}
+        texts = {}
+        for block_id in self.dirty:
+            block = self.find_block(block_id)
+            if block is not None:
+                texts[block_id] = block.text()
+                self.submitted[block_id] = generation
+        self.dirty = set()
+        return texts
+
+    # getting the blocks still in the document that contain any of the given words
+    def blocks_with_words(self, words):
+        blocks = {}
+        for block_id in self.words.blocks_with(words):
+            block = self.find_block(block_id)
+            if block is not None:
+                blocks[block_id] = block
+        return blocks
+
+    # merging tagging results into the store, given for each block id as (generation of the job the block was sent in,
+    # its new tags, {word: category} for words that are new or changed, words that were removed)
+    # the changes are relative to the block's tags when it was sent, which are still its tags if it hasn't been sent
+    # again since, so only the changed words are counted again
+    def apply_results(self, results):
+        touched = set()
+        tagged = set()
+        for block_id, (generation, tags, changed, removed) in results.items():
+            # skipping blocks that were deleted, edited again since being sent, or sent again so a newer result is coming
+            if block_id in self.dirty or self.submitted.get(block_id, generation) != generation or self.find_block(block_id) is None:
+                continue
+            old_tags = self.block_tags.get(block_id, {})
+            self.count_tags({word: old_tags[word] for word in itertools.chain(removed, changed) if word in old_tags}, -1, touched)
+            self.count_tags(changed, 1, touched)
+            self.block_tags[block_id] = tags
+            tagged.add(block_id)
+        if tagged:
+            self.block_tags_changed.emit(tagged)
+        changed = self.update_categories(touched)
+        if changed:
+            self.tags_changed.emit(changed)
+        return changed
+
+    # adding or removing one block's tags from the per word counts
+    def count_tags(self, tags, delta, touched):
+        for word, category in tags.items():
+            counts = self.word_counts.setdefault(word, Counter())
+            counts[category] += delta
+            if counts[category] <= 0:
+                del counts[category]
+            if not counts:
+                del self.word_counts[word]
+            touched.add(word)
+
+    # working out the category of each touched word, the one given by the most blocks, returning words that changed
+    def update_categories(self, words):
+        changed = set()
+        for word in words:
+            counts = self.word_counts.get(word)
+            category = majority_category(counts)
+            old_category = self.word_categories.get(word)
+            if category == old_category:
+                continue
+            if old_category is not None:
+                self.categories[old_category].discard(word)
+            if category is None:
+                del self.word_categories[word]
+            else:
+                self.word_categories[word] = category
+                self.categories[category].add(word)
+            changed.add(word)
+        return changed
+
+# id given to a block by the tag store, or None for an invalid block or one not given an id yet
+def block_id(block):
+    data = block.userData() if block.isValid() else None
+    return data.block_id if isinstance(data, BlockData) else None
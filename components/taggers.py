@@ -0,0 +1,152 @@
+import importlib
+import json
+import os
+import threading
+
+# nltk takes a while to import and its tagger model takes a while to load, so neither happens until first needed
+# the editor warms them up on the worker thread after the window is shown
+_nltk = None
+_lock = threading.RLock()
+
+def nltk_module():
+    global _nltk
+    if _nltk is None:
+        with _lock:
+            if _nltk is None:
+                _nltk = importlib.import_module("nltk")
+    return _nltk
+
+# one perceptron tagger for the whole process, creating it loads the model from disk
+_perceptron = None
+
+def perceptron():
+    global _perceptron
+    if _perceptron is None:
+        with _lock:
+            if _perceptron is None:
+                _perceptron = nltk_module().tag.PerceptronTagger()
+    return _perceptron
+
+# tagging a list of words with the nltk averaged perceptron tagger, as a list of (word, tag)
+# same as nltk.pos_tag for english, without looking the tagger up again for every sentence
+def nltk_pos_tag(words):
+    return perceptron().tag(words)
+
+# importing nltk and loading the tagger model, so the first real tagging doesn't wait for them
+def warm_up(name=None):
+    make_tagger(name).tag(["warm", "up"])
+
+# version of nltk without importing it where the package metadata is available
+def nltk_version():
+    try:
+        from importlib.metadata import version
+        return version("nltk")
+    except Exception:
+        return nltk_module().__version__
+
+# word -> most frequent tag for words the perceptron always tags the same way, kept once loaded
+_lexicon = None
+
+def lexicon_path():
+    # imported here as the disk cache needs this module for the nltk version
+    from components.disk_cache import default_cache_dir
+    return os.path.join(default_cache_dir(), f"lexicon-{nltk_version()}.json")
+
+# the lexicon saved by an earlier session if there is one, otherwise taken from the perceptron model and saved
+# stored as tag -> space separated words, a lot smaller and quicker to read than the model itself
+# empty if neither is available, words are then tagged by their endings only
+def lexicon():
+    global _lexicon
+    if _lexicon is None:
+        with _lock:
+            if _lexicon is None:
+                _lexicon = load_lexicon(lexicon_path())
+    return _lexicon
+
+def load_lexicon(path):
+    try:
+        with open(path, 'r', encoding="utf-8") as file:
+            words_by_tag = json.load(file)
+        return {word: tag for tag, words in words_by_tag.items() for word in words.split(" ")}
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        tagdict = dict(perceptron().tagdict)
+    except (LookupError, OSError, AttributeError):
+        return {}
+    words_by_tag = {}
+    for word, tag in tagdict.items():
+        if " " not in word:
+            words_by_tag.setdefault(tag, []).append(word)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding="utf-8") as file:
+            json.dump({tag: " ".join(words) for tag, words in words_by_tag.items()}, file, separators=(",", ":"))
+    except OSError:
+        pass
+    return tagdict
+
+# rough tag for a word not in the lexicon, from its ending
+SUFFIX_TAGS = (("ly", "RB"), ("ing", "VBG"), ("ed", "VBD"), ("ous", "JJ"), ("ful", "JJ"), ("ive", "JJ"),
+    ("able", "JJ"), ("ible", "JJ"), ("al", "JJ"), ("less", "JJ"), ("ish", "JJ"), ("ise", "VB"), ("ize", "VB"))
+
+def guess_tag(word):
+    if word.isdigit():
+        return "CD"
+    lower = word.lower()
+    for suffix, tag in SUFFIX_TAGS:
+        if lower.endswith(suffix) and len(lower) > len(suffix) + 2:
+            return tag
+    return "NN"
+
+# tagger backends, each with tag(words) -> list of (word, tag)
+# cache_name is shared by backends that always give the same tags, so they can use each other's cached results
+# parallel is whether large jobs are worth spreading across the process pool
+
+# the nltk averaged perceptron, the most accurate and the slowest
+class PerceptronBackend:
+    name = "perceptron"
+    cache_name = "perceptron"
+    parallel = True
+
+    def tag(self, words):
+        return nltk_pos_tag(words)
+
+# looking each word up in the lexicon, guessing from the ending for unknown words
+# ignores context so words like "run" always get the same tag, much faster than the perceptron
+class LexiconBackend:
+    name = "lexicon"
+    cache_name = "lexicon"
+    parallel = False
+
+    def tag(self, words):
+        tags = lexicon()
+        return [(word, tags.get(word) or tags.get(word.lower()) or guess_tag(word)) for word in words]
+
+# sentences made up only of words the perceptron always tags the same way are tagged from the lexicon
+# the rest go through the perceptron, which uses the same lexicon for those words, so the tags always match it
+class HybridBackend:
+    name = "hybrid"
+    cache_name = "perceptron"
+    parallel = True
+
+    def tag(self, words):
+        tags = lexicon()
+        found = [tags.get(word) for word in words]
+        if all(found):
+            return list(zip(words, found))
+        return nltk_pos_tag(words)
+
+TAGGERS = {backend.name: backend for backend in (PerceptronBackend, HybridBackend, LexiconBackend)}
+
+# the default gives the same tags as the perceptron, only faster
+DEFAULT_TAGGER = "hybrid"
+
+# backend instances are stateless so one of each is shared
+_backends = {}
+
+def make_tagger(name=None):
+    name = name if name in TAGGERS else DEFAULT_TAGGER
+    if name not in _backends:
+        _backends[name] = TAGGERS[name]()
+    return _backends[name]
@@ -0,0 +1,65 @@
+from components.tokens import tokenise, split_sentences
+from components.sentence_cache import sentence_key
+from collections import Counter
+import sys
+
+# tagging and counting shared by the background worker, the stats and headless batch mode
+# so the editor and batch mode always tag and count text the same way
+
+# the words of each sentence in a block
+def block_sentences(text):
+    return [words for words in (tokenise(sentence) for sentence in split_sentences(text)) if words]
+
+# tagging the words of one sentence together so the tagger has context, using the cache where possible
+# returns a tuple of (word, category) for the words in one of the highlighted categories
+def tag_sentence(words, cache, tagger):
+    if not words:
+        return ()
+    key = sentence_key(words, tagger.cache_name)
+    tags = cache.get(key)
+    if tags is None:
+        tags = categorised(tagger.tag(words))
+        cache.put(key, tags)
+    return tags
+
+# keeping only the words of a tagged sentence in one of the highlighted categories, as (word, category) pairs
+# words are interned so each word is one string shared by the cache, the tag stores and the highlighter
+def categorised(tagged):
+    return tuple((sys.intern(word), category) for word, category in ((word, tag_category(tag)) for word, tag in tagged)
+        if category is not None)
+
+# the category of each word in a block from the tags of its sentences, a later sentence wins for repeated words
+def block_categories(sentence_tags):
+    block_tags = {}
+    for tags in sentence_tags:
+        for word, category in tags:
+            block_tags[word] = category
+    return block_tags
+
+# the big parts of speech for now (start of tag to be more broad, may be tagged with multiple longer versions)
+def tag_category(tag):
+    if tag.startswith("VB"):
+        return "verbs"
+    elif tag.startswith("NN"):
+        return "nouns"
+    elif tag.startswith("JJ"):
+        return "adjs"
+    elif tag.startswith("RB"):
+        return "adverbs"
+    return None
+
+# counting the uses of each category in a block from its tokens (token -> uses) and its own tags, as the highlighter
+# colours them, along with the uses of the tokens that were counted, the rest count under their category across the
+# document instead
+def count_categories(tokens, tags):
+    categories, tagged = Counter(), Counter()
+    for word, count in tokens.items():
+        category = tags.get(word)
+        if category is not None:
+            categories[category] += count
+            tagged[word] = count
+    return categories, tagged
+
+# the category a word has across the document, the one given to it by the most blocks
+def majority_category(counts):
+    return counts.most_common(1)[0][0] if counts else None
@@ -3,25 +3,26 @@ from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal, QEvent
 from PyQt5.QtGui import QFont, QFontDatabase, QColor, QSyntaxHighlighter, QTextCharFormat, QIcon, QKeySequence, QTextCursor, QKeyEvent
 import sys
 
+# pairs typed together, the opening key and the text inserted for it
+CLOSING_PAIRS = {Qt.Key_ParenLeft: "()", Qt.Key_QuoteDbl: "\"\"", Qt.Key_BraceLeft: "{}", Qt.Key_BracketLeft: "[]"}
+
+# doubling up brackets and quotes automatically, shared by the rich and plain text editors
+# returns true if the key press was handled
+def close_brackets(editor, event):
+    if event.type() == QEvent.KeyPress and event.key() in CLOSING_PAIRS:
+        cursor = editor.textCursor()
+        editor.insertPlainText(CLOSING_PAIRS[event.key()])
+        # moving cursor back one to be in between brackets
+        cursor.movePosition(QTextCursor.Left, QTextCursor.MoveAnchor, 1)
+        # reconnecting cursor to widget
+        editor.setTextCursor(cursor)
+        return True
+    return False
+
 class QTextEdit(qtw.QTextEdit):
     # overriding method in case of some events
     def keyPressEvent(self, event: QKeyEvent) -> None:
-        # doubling up brackets and quotes automatically
-        if event.type() == QEvent.KeyPress and event.key() in [Qt.Key_ParenLeft, Qt.Key_QuoteDbl,
-        Qt.Key_BraceLeft, Qt.Key_BracketLeft]:
-            cursor = self.textCursor()
-            if event.key() == Qt.Key_ParenLeft:
-                self.insertPlainText("()")
-            elif event.key() == Qt.Key_QuoteDbl:
-                self.insertPlainText("\"\"")
-            elif event.key() == Qt.Key_BraceLeft:
-                self.insertPlainText("{}")
-            elif event.key() == Qt.Key_BracketLeft:
-                self.insertPlainText("[]")
-            # moving cursor back one to be in between brackets
-            cursor.movePosition(QTextCursor.Left, QTextCursor.MoveAnchor, 1)
-            # reconnecting cursor to widget
-            self.setTextCursor(cursor)
+        if close_brackets(self, event):
             return
         # otherwise falling back to default super method of parent class
-        return super().keyPressEvent(event)
\ No newline at end of file
+        return super().keyPressEvent(event)
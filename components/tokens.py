@@ -0,0 +1,15 @@
+import re
+
+# words as both tagged and highlighted, letters/digits with any inner apostrophes, so "dog," and "dog" are the same word
+WORD_PATTERN = re.compile(r"\w+(?:['’]\w+)*")
+
+# getting the words of some text in order, used for tagging
+def tokenise(text):
+    return WORD_PATTERN.findall(text)
+
+# end of a sentence, one or more of .!? (with any closing quotes/brackets) followed by whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?])[\"'’”)\]]*\s+")
+
+# splitting some text into sentences, good enough for prose without needing a trained model
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_END.split(text) if sentence.strip()]
@@ -1,49 +1,240 @@
 import PyQt5.QtWidgets as qtw
 from PyQt5.QtCore import QSize, Qt, QThread, pyqtSignal, QEvent
 from PyQt5.QtGui import QFont, QFontDatabase, QColor, QSyntaxHighlighter, QTextCharFormat, QIcon, QKeySequence, QTextCursor, QKeyEvent
-import nltk
-import sys
+from components.sentence_cache import SentenceCache, sentence_key
+from components.tagging import block_sentences, tag_sentence, categorised, block_categories
+from components.profiler import profiler
+from components.taggers import make_tagger
+from components import startup
+from concurrent.futures import FIRST_COMPLETED, wait
+import queue
+import traceback
 
-# worker thread for background process, using singal to pass info back to gui app
-# and adding a class property to pass from gui to thread
+# long lived worker thread for background process, using singal to pass info back to gui app
+# jobs are passed from gui to thread through a queue so the thread sleeps while there is nothing to tag
 class WorkerThread(QThread):
     return_value = pyqtSignal(object)
-    def __init__(self, text):
+    def __init__(self, cache=None, process_tagger=None, tagger=None):
         super(WorkerThread, self).__init__()
-        self.text = text
+        self.jobs = queue.Queue()
+        # backend used to tag sentences, a new choice from the gui is picked up at the start of the next job
+        self.tagger = make_tagger(tagger)
+        self.tagger_name = self.tagger.name
+        # tags of each sentence already seen, so unchanged sentences are never tagged again
+        self.cache = cache if cache is not None else SentenceCache()
+        # optional pool of processes for large jobs, jobs with fewer untagged words than the threshold stay in this thread
+        self.process_tagger = process_tagger
+        self.pool_threshold = 5000
+        # generation of the newest job submitted, a running job stops early once a newer one arrives
+        self.latest_generation = 0
+        # tags the gui had for each block of the running job when it was submitted, results are sent as changes to these
+        self.bases = {}
+        # generation each block of the running job was submitted in, sent back so the gui can tell which is the latest
+        self.block_generations = {}
 
-        self.verbs = []
-        self.nouns = []
-        self.adjs = []
-        self.adverbs = []
+    # called from the gui thread with the blocks that changed, as a dict of block id -> block text
+    # and the tags the gui has for those blocks, as a dict of block id -> {word: category} (or None if untagged)
+    def submit(self, generation, blocks, bases=None):
+        self.latest_generation = generation
+        self.jobs.put((generation, blocks, bases or {}))
+
+    # choosing a different tagger backend, called from the gui thread
+    def set_tagger(self, name):
+        self.tagger_name = name
+
+    # asking the thread to finish after the current job and waiting for it
+    def stop(self):
+        if self.isRunning():
+            self.jobs.put(None)
+            self.wait()
+        if self.process_tagger is not None:
+            self.process_tagger.shutdown()
 
     def run(self):
-        # method automatically runs when the gui starts the thread
-        # runs the other main method set_pos_lists and emits it back for the app to catch
-        self.return_value.emit(self.set_pos_lists())
-
-    def set_pos_lists(self):
-        # get all the words from the input, pos tag and assign to list depending on which one they are?
-        all_words = set(self.text.split())
-        # the big parts of speech for now (start of tag to be more broad, may be tagged with multiple longer versions)
-        verb_tag_start = "VB"
-        noun_tag_start = "NN"
-        adjective_tag_start = "JJ"
-        adverb_tag_start = "RB"
-
-        # tagging and adding to list based on tags
-        for word, tag in nltk.pos_tag(all_words):
-            if tag.startswith((verb_tag_start, noun_tag_start, adjective_tag_start, adverb_tag_start)):
-                if tag.startswith(verb_tag_start):
-                    self.verbs.append(word)
-                elif tag.startswith(noun_tag_start):
-                    self.nouns.append(word)
-                elif tag.startswith(adjective_tag_start):
-                    self.adjs.append(word)
+        # method automatically runs when the gui starts the thread, waiting for jobs until stopped
+        # runs the other main method set_pos_lists on each job and emits it back for the app to catch
+        # loading the tagger now, in the background, rather than in the middle of the first job
+        # guarded like each job, if it fails (eg the tagger's model data is missing) the error is printed and the thread
+        # still waits for jobs, so tagging works again once a tagger that loads is chosen
+        try:
+            with profiler.span("worker.warm_up"):
+                self.tagger.tag(["warm", "up"])
+            startup.mark("tagger_ready")
+        except Exception:
+            traceback.print_exc()
+        pending = {}
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.cache.flush()
+                return
+            generation, blocks, bases = job
+            # blocks left over from a cancelled job go first, newer text for the same block replaces them
+            self.bases = {block_id: self.bases[block_id] for block_id in pending if block_id in self.bases}
+            self.block_generations = {block_id: self.block_generations[block_id] for block_id in pending}
+            self.add_job(generation, blocks, bases)
+            blocks = {**pending, **blocks}
+            # coalescing any jobs that queued up while the last one was running
+            while not self.jobs.empty():
+                job = self.jobs.get()
+                if job is None:
+                    self.cache.flush()
+                    return
+                generation, newer_blocks, newer_bases = job
+                self.add_job(generation, newer_blocks, newer_bases)
+                blocks.update(newer_blocks)
+            profiler.gauge("worker.queue_depth", self.jobs.qsize())
+            profiler.gauge("worker.job_blocks", len(blocks))
+            # results from the process pool are emitted as each shard finishes, the rest once the job is done
+            # a job that fails is dropped rather than ending the thread, which would take the gui down with it
+            try:
+                self.tagger = make_tagger(self.tagger_name)
+                with profiler.span("worker.tag_job"):
+                    result_dict, pending = self.set_pos_lists(blocks, generation, self.emit_changes)
+                if result_dict:
+                    self.emit_changes(result_dict)
+            except Exception:
+                traceback.print_exc()
+                pending = {}
+            # saving newly tagged sentences to disk here so the gui thread never waits on it
+            self.cache.flush()
+
+    def set_pos_lists(self, blocks, generation=None, emit=None):
+        # get the sentences from each changed block, pos tag and assign words to category depending on which one they are
+        sentences = {block_id: block_sentences(text) for block_id, text in blocks.items()}
+        # loading tags saved on disk by earlier sessions for any sentences not in memory
+        self.cache.prefetch(self.key(words) for sentences_in_block in sentences.values() for words in sentences_in_block)
+
+        if self.process_tagger is not None and self.process_tagger.enabled() and self.tagger.parallel:
+            untagged = {}
+            for sentences_in_block in sentences.values():
+                for words in sentences_in_block:
+                    untagged[self.key(words)] = len(words)
+            untagged_words = sum(count for key, count in untagged.items() if key not in self.cache)
+            if untagged_words >= self.pool_threshold:
+                return self.tag_in_processes(blocks, sentences, generation, emit)
+
+        result_dict = {}
+        remaining = dict(blocks)
+        for block_id, sentences_in_block in sentences.items():
+            # stopping if newer text has been submitted, the untagged blocks are carried into the next job
+            if generation is not None and generation != self.latest_generation:
+                break
+            result_dict[block_id] = block_categories(self.tag_sentence(words) for words in sentences_in_block)
+            del remaining[block_id]
+
+        # returning words categorised within a dict for each block, along with any blocks not reached
+        return result_dict, remaining
+
+    # keeping the tags and generation each block of a job was submitted with
+    def add_job(self, generation, blocks, bases):
+        self.bases.update(bases)
+        self.block_generations.update(dict.fromkeys(blocks, generation))
+
+    # sending the gui only what changed in each block compared to the tags it had when the block was submitted,
+    # as block id -> (generation it was submitted in, new tags, {word: category} for new or changed words, removed words)
+    # blocks whose tags came out the same aren't sent at all
+    def emit_changes(self, result_dict):
+        changes = {}
+        for block_id, tags in result_dict.items():
+            old_tags = self.bases.get(block_id) or {}
+            changed = {word: category for word, category in tags.items() if old_tags.get(word) != category}
+            removed = [word for word in old_tags if word not in tags]
+            if changed or removed:
+                changes[block_id] = (self.block_generations.get(block_id), tags, changed, removed)
+        profiler.gauge("worker.changed_blocks", len(changes))
+        if changes:
+            self.return_value.emit(changes)
+
+    # sharding the blocks with untagged sentences across the process pool, about the same number of words in each shard
+    # blocks are passed to emit as soon as all of their sentences are tagged, if given
+    def tag_in_processes(self, blocks, sentences_by_block, generation, emit):
+        result_dict = {}
+        remaining = dict(blocks)
+        shard_size = max(self.pool_threshold // 4, 1)
+        shards = []
+        # blocks waiting on sentences still being tagged, as (block id, sentences, sentence keys)
+        waiting = []
+        shard_sentences, shard_words = [], 0
+        # sentences already sent to a shard, repeated sentences are only tagged once
+        sharded = set()
+        for block_id, sentences in sentences_by_block.items():
+            keys = [self.key(words) for words in sentences]
+            untagged = False
+            for key, words in zip(keys, sentences):
+                if key in sharded:
+                    untagged = True
+                elif self.cache.get(key) is None:
+                    sharded.add(key)
+                    untagged = True
+                    shard_sentences.append(words)
+                    shard_words += len(words)
+                    if shard_words >= shard_size:
+                        shards.append(shard_sentences)
+                        shard_sentences, shard_words = [], 0
+            if untagged:
+                waiting.append((block_id, sentences, keys))
+            else:
+                result_dict[block_id] = block_categories(self.tag_sentence(words) for words in sentences)
+                del remaining[block_id]
+        if shard_sentences:
+            shards.append(shard_sentences)
+
+        # tags of the sentences tagged by the pool during this job
+        tagged = {}
+        # if the pool fails, eg one of its processes is killed, it is shut down so the next job starts a new one
+        # and the sentences it didn't tag are tagged in this thread instead
+        failed = False
+        try:
+            futures = {self.process_tagger.submit(sentences, self.tagger.name): sentences for sentences in shards}
+        except Exception:
+            futures = {}
+            failed = True
+        not_done = set(futures)
+        while not_done:
+            done, not_done = wait(not_done, timeout=0.1, return_when=FIRST_COMPLETED)
+            # stopping if newer text has been submitted, blocks not finished are carried into the next job
+            if generation is not None and generation != self.latest_generation:
+                for future in not_done:
+                    future.cancel()
+                break
+            try:
+                for future in done:
+                    for words, tags in zip(futures[future], future.result()):
+                        key = self.key(words)
+                        tagged[key] = categorised(tags)
+                        self.cache.put(key, tagged[key])
+            except Exception:
+                failed = True
+                break
+            ready = {}
+            still_waiting = []
+            for block_id, sentences, keys in waiting:
+                if all(key in tagged or key not in sharded for key in keys):
+                    ready[block_id] = block_categories(tagged[key] if key in tagged else self.tag_sentence(words)
+                        for key, words in zip(keys, sentences))
+                    del remaining[block_id]
                 else:
-                    self.adverbs.append(word)
+                    still_waiting.append((block_id, sentences, keys))
+            waiting = still_waiting
+            if emit is not None and ready:
+                emit(ready)
+            else:
+                result_dict.update(ready)
+        if failed:
+            self.process_tagger.shutdown()
+            for block_id, sentences, keys in waiting:
+                if generation is not None and generation != self.latest_generation:
+                    break
+                result_dict[block_id] = block_categories(tagged[key] if key in tagged else self.tag_sentence(words)
+                    for key, words in zip(keys, sentences))
+                del remaining[block_id]
+        return result_dict, remaining
+
+    # cache key of a sentence for the current backend
+    def key(self, words):
+        return sentence_key(words, self.tagger.cache_name)
 
-        result_dict = {"verbs": self.verbs, "nouns": self.nouns, "adjs": self.adjs, "adverbs": self.adverbs}
-        
-        # returning all words categorised within single dict
-        return result_dict
\ No newline at end of file
+    # tagging one sentence with the current backend, using the cache where possible
+    def tag_sentence(self, words):
+        return tag_sentence(words, self.cache, self.tagger)
@@ -1,9 +1,18 @@
+import time
+start_time = time.perf_counter()
+
 from components import MainWindow
+from components import startup
 
 import PyQt5.QtWidgets as qtw
+import multiprocessing
 import sys
 
 if __name__=="__main__":
+    # needed for the tagging process pool when running as a frozen executable
+    multiprocessing.freeze_support()
+    startup.begin(start_time)
+    startup.mark("imports")
     app = qtw.QApplication(sys.argv)
 
     window = MainWindow()
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import PyQt5.QtWidgets as qtw
+
+# one application for the whole run, documents and timers need it to exist
+@pytest.fixture(scope="session")
+def app():
+    application = qtw.QApplication.instance() or qtw.QApplication([])
+    yield application
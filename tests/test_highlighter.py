@@ -0,0 +1,52 @@
+from PyQt5.QtGui import QColor, QTextCharFormat, QTextDocument
+
+from components.highlighter import SyntaxHighlighter
+
+RED, GREEN, BLUE = "#ff0000", "#008000", "#0000ff"
+
+def colour_format(colour):
+    format = QTextCharFormat()
+    format.setForeground(QColor(colour))
+    return format
+
+# the colour name of each character of a one line document highlighted with regex rules given as
+# (pattern, colour, priority), "" where nothing was drawn
+def highlighted_colours(text, rules, combined=True):
+    document = QTextDocument()
+    document.documentLayout()
+    highlighter = SyntaxHighlighter()
+    for pattern, colour, priority in rules:
+        highlighter.set_mapping(pattern, colour_format(colour), priority)
+    if not combined:
+        highlighter._combined = False
+    highlighter.setDocument(document)
+    document.setPlainText(text)
+    colours = [""] * len(text)
+    for format_range in document.begin().layout().formats():
+        for position in range(format_range.start, format_range.start + format_range.length):
+            colours[position] = format_range.format.foreground().color().name()
+    return colours
+
+def test_higher_priority_match_inside_lower_one(app):
+    text = "x = 1 # fix TODO later"
+    colours = highlighted_colours(text, [(r"#.*$", GREEN, 0), (r"TODO", RED, 5)])
+    todo = text.index("TODO")
+    assert colours[text.index("#"):todo] == [GREEN] * (todo - text.index("#"))
+    assert colours[todo:todo + 4] == [RED] * 4
+    assert colours[todo + 4:] == [GREEN] * len(" later")
+
+# a quote starting inside emphasis but ending after it is still drawn whole, over the emphasis
+def test_higher_priority_match_running_past_lower_one(app):
+    text = '*emph "quote* more"'
+    rules = [(r"\*[^*]*\*", GREEN, 0), (r'"[^"]*"', BLUE, 1)]
+    colours = highlighted_colours(text, rules)
+    quote = text.index('"')
+    assert colours[:quote] == [GREEN] * quote
+    assert colours[quote:] == [BLUE] * (len(text) - quote)
+    assert colours == highlighted_colours(text, rules, combined=False)
+
+# where a lower priority match starts inside a higher priority one, the higher priority one still wins
+def test_lower_priority_match_inside_higher_one_tail(app):
+    text = '*a "b* c *d" e*'
+    rules = [(r"\*[^*]*\*", GREEN, 0), (r'"[^"]*"', BLUE, 1)]
+    assert highlighted_colours(text, rules) == highlighted_colours(text, rules, combined=False)
@@ -0,0 +1,172 @@
+from collections import Counter
+import random
+
+from PyQt5.QtGui import QTextCursor, QTextDocument
+import pytest
+
+from components.tag_store import TagStore, BlockData
+from components.stats_engine import StatsEngine
+from components.search_index import SearchIndex
+from components.tokens import tokenise
+
+WORDS = "run saw the dog big ran ate apple red quickly".split()
+
+# a stand in for the tagger, any word after "the" or starting with a vowel is a noun and the rest are verbs
+# so the same word can be tagged differently in different blocks, a later use wins within a block
+def fake_tags(text):
+    tags = {}
+    previous = None
+    for word in tokenise(text):
+        tags[word] = "nouns" if previous == "the" or word[0] in "aeiou" else "verbs"
+        previous = word
+    return tags
+
+# tagging the dirty blocks like the scheduler and worker do, sending back changes from the tags each block had
+def tag_dirty(store, generation):
+    blocks = store.take_dirty(generation)
+    results = {}
+    for block_id, text in blocks.items():
+        old_tags = store.block_tags.get(block_id) or {}
+        tags = fake_tags(text)
+        changed = {word: category for word, category in tags.items() if old_tags.get(word) != category}
+        removed = [word for word in old_tags if word not in tags]
+        results[block_id] = (generation, tags, changed, removed)
+    store.apply_results(results)
+
+# a document with a layout, like an editor's, the document only reports changes once it has one
+def make_document(text):
+    document = QTextDocument()
+    document.documentLayout()
+    document.setPlainText(text)
+    return document
+
+def live_blocks(document):
+    blocks = []
+    block = document.begin()
+    while block.isValid():
+        blocks.append(block)
+        block = block.next()
+    return blocks
+
+# checking everything kept up to date as the document changes against counting it all again
+def check_against_recount(document, store, stats, search):
+    blocks = live_blocks(document)
+    ids = [block.userData().block_id for block in blocks]
+    assert all(isinstance(block.userData(), BlockData) for block in blocks)
+    assert len(set(ids)) == len(ids)
+    assert set(store.blocks) == set(ids)
+    assert set(store.block_tags) <= set(ids)
+    assert all(store.find_block(block_id) is not None for block_id in ids)
+
+    assert stats.word_count == sum(len(block.text().split()) for block in blocks)
+    assert +stats.token_counts == Counter(word for block in blocks for word in tokenise(block.text()))
+
+    check_word_index(store.words, {block.userData().block_id: set(tokenise(block.text())) for block in blocks})
+    check_word_index(search.words, {block.userData().block_id: {word.lower() for word in tokenise(block.text())}
+        for block in blocks})
+
+    word_counts = {}
+    for block_id in ids:
+        for word, category in store.block_tags.get(block_id, {}).items():
+            word_counts.setdefault(word, Counter())[category] += 1
+    assert store.word_counts == word_counts
+    assert set(store.word_categories) == set(word_counts)
+
+    # each use of a word counted with its block's own tag, or its category across the document if its block has none
+    category_counts = Counter()
+    for block in blocks:
+        tags = store.block_tags.get(block.userData().block_id, {})
+        for word in tokenise(block.text()):
+            category = tags.get(word, store.word_categories.get(word))
+            if category is not None:
+                category_counts[category] += 1
+    assert +stats.category_counts == category_counts
+
+    if search.pattern is not None:
+        check_search(document, search)
+
+# the number of matches, and the match found going either way from each position, against searching the whole text
+def check_search(document, search):
+    text = document.toPlainText()
+    positions = [match.start() for match in search.pattern.finditer(text)]
+    assert search.match_count() == min(len(positions), search.count_limit)
+    for position in range(len(text) + 1):
+        after = [start for start in positions if start >= position] or positions
+        before = [start for start in positions if start < position] or positions
+        match = search.next_match(position)
+        assert (match and match[0]) == (after[0] if after else None)
+        match = search.next_match(position, backward=True)
+        assert (match and match[0]) == (before[-1] if before else None)
+
+def check_word_index(index, block_words):
+    assert index.block_words == {block_id: words for block_id, words in block_words.items() if words}
+    word_blocks = {}
+    for block_id, words in block_words.items():
+        for word in words:
+            word_blocks.setdefault(word, set()).add(block_id)
+    assert index.word_blocks == word_blocks
+
+def random_text(rng):
+    lines = [" ".join(rng.choice(WORDS) for _ in range(rng.randrange(5))) for _ in range(rng.randrange(1, 4))]
+    return "\n".join(lines)
+
+# searching for a common whole word, part of a word in most blocks and a phrase only a few blocks have
+QUERIES = [("the", True), ("a", False), ("quickly apple", False)]
+
+@pytest.mark.parametrize("seed", range(6))
+def test_random_edits_match_recount(app, seed):
+    rng = random.Random(seed)
+    document = make_document("\n".join(random_text(rng) for _ in range(20)))
+    store = TagStore(document)
+    stats, search = StatsEngine(store), SearchIndex(store)
+    search.set_query(*QUERIES[seed % len(QUERIES)])
+    store.mark_all_dirty()
+    generation = 0
+    for step in range(300):
+        cursor = QTextCursor(document)
+        end = document.characterCount() - 1
+        start = rng.randrange(end + 1)
+        cursor.setPosition(start)
+        cursor.setPosition(min(end, start + rng.randrange(40)), QTextCursor.KeepAnchor)
+        action = rng.random()
+        if action < 0.1 and document.isUndoAvailable():
+            document.undo()
+        elif action < 0.2:
+            cursor.removeSelectedText()
+        else:
+            cursor.insertText(random_text(rng))
+        if step % 7 == 0:
+            generation += 1
+            tag_dirty(store, generation)
+        check_against_recount(document, store, stats, search)
+
+# replacing lines with the same number of lines removes as many blocks as it adds, so the count doesn't change
+def test_replacing_lines_drops_removed_blocks(app):
+    document = make_document("alpha one\nbeta two\ngamma three\ndelta four\nepsilon five")
+    store = TagStore(document)
+    stats, search = StatsEngine(store), SearchIndex(store)
+    store.mark_all_dirty()
+    tag_dirty(store, 1)
+    cursor = QTextCursor(document)
+    cursor.setPosition(document.findBlockByNumber(1).position())
+    cursor.setPosition(document.findBlockByNumber(3).position() + len("delta four"), QTextCursor.KeepAnchor)
+    cursor.insertText("zeta six\neta seven\ntheta eight")
+    tag_dirty(store, 2)
+    assert document.blockCount() == 5
+    assert len(store.blocks) == 5
+    assert "beta" not in store.word_categories
+    check_against_recount(document, store, stats, search)
+
+# a word keeps the part of speech it has in its own block rather than the one most blocks give it
+def test_words_counted_with_their_own_blocks_tags(app):
+    document = make_document("I saw the run.\nrun\nrun")
+    store = TagStore(document)
+    stats, search = StatsEngine(store), SearchIndex(store)
+    store.mark_all_dirty()
+    tag_dirty(store, 1)
+    assert store.word_categories["run"] == "verbs"
+    assert store.block_tags[document.begin().userData().block_id]["run"] == "nouns"
+    # the first "run" is a noun, "I", "saw", "the" and the other two uses of "run" are verbs
+    assert stats.category_counts["nouns"] == 1
+    assert stats.category_counts["verbs"] == 5
+    check_against_recount(document, store, stats, search)